@@ -1,100 +1,240 @@
+import asyncio
 import json
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, defer
 
 from backend.app.core.config import settings
 from backend.app.core.database import SessionLocal, get_db
 from backend.app.models import ProductRun, ProcessingLog
-from backend.app.schemas import AnalyzeRequest, DraftRequest, QueueItemResponse, SettingsPayload, StatusResponse
+from backend.app.schemas import (
+    AnalyzeRequest,
+    BatchRequest,
+    DraftRequest,
+    PricingDryRunRequest,
+    QueueItemResponse,
+    SettingsPayload,
+    StatusResponse,
+    WatchFolder,
+    WorkerStatus,
+)
+from backend.app.services.ai_cache import AIResultCache
 from backend.app.services.ai_service import LocalAIService
-from backend.app.services.config_store import ConfigStore
+from backend.app.services.batches import BatchService, expand_paths
+from backend.app.services.captioner import CaptionWorker
+from backend.app.services.catalog_cache import CatalogCache
+from backend.app.services.config_store import ConfigStore, SettingsSnapshot
+from backend.app.services.events import SnapshotFeed, event_bus
+from backend.app.services.job_queue import JobQueue
 from backend.app.services.monitor_service import MonitorManager
-from backend.app.services.printify_service import PrintifyClient
+from backend.app.services.pipeline import PipelineEngine, PipelineJob, run_summary
+from backend.app.services.preprocess import ImagePreprocessor, thumbnail_url
+from backend.app.services.pricing import PricingEngine
+from backend.app.services.similarity import PerceptualIndex
+from backend.app.services.printify_service import AsyncPrintifyClient, PrintifyClient, draft_templates
+from backend.app.services.rate_limiter import PrintifyScheduler
+from backend.app.services.stats import COUNTERS, counters, reconcile, series, window_totals
+from backend.app.services.upload_registry import UploadRegistry
 
 router = APIRouter()
-ai_service = LocalAIService(settings.ollama_model)
-
-
-def get_printify_from_config(config: Dict) -> PrintifyClient:
+ai_service = LocalAIService(
+    settings.ollama_model,
+    CaptionWorker(
+        max_batch_size=settings.caption_batch_size,
+        max_wait_ms=settings.caption_max_wait_ms,
+        num_threads=settings.caption_threads,
+    ),
+    AIResultCache(SessionLocal, max_entries=settings.ai_cache_max_entries),
+    combined=settings.ollama_combined,
+    keep_alive=settings.ollama_keep_alive,
+    ollama_host=settings.ollama_host,
+    max_in_flight=settings.ollama_num_parallel,
+    request_timeout=settings.ollama_request_timeout,
+)
+printify_scheduler = PrintifyScheduler(
+    global_per_minute=settings.printify_rate_global_per_minute,
+    catalog_per_minute=settings.printify_rate_catalog_per_minute,
+    upload_per_minute=settings.printify_rate_upload_per_minute,
+    product_per_minute=settings.printify_rate_product_per_minute,
+    max_retries=settings.printify_max_retries,
+)
+catalog_cache = CatalogCache(
+    SessionLocal,
+    ttl_seconds=settings.catalog_cache_ttl_seconds,
+    max_entries=settings.catalog_cache_max_entries,
+)
+upload_registry = UploadRegistry(SessionLocal)
+preprocessor = ImagePreprocessor(
+    settings.storage_dir,
+    caption_size=settings.caption_image_size,
+    thumbnail_size=settings.thumbnail_size,
+)
+
+
+def printify_credentials(config: Dict) -> Tuple[str, str]:
     key = config.get("printify_api_key") or settings.printify_api_key
     shop = config.get("printify_shop_id") or settings.printify_shop_id
     if not key or not shop:
         raise RuntimeError("Printify API key and shop ID are required")
-    return PrintifyClient(key, shop)
+    return key, shop
+
+
+def get_printify_from_config(config: Dict) -> PrintifyClient:
+    return PrintifyClient(
+        *printify_credentials(config),
+        base_url=settings.printify_base_url,
+        scheduler=printify_scheduler,
+        catalog=catalog_cache,
+        uploads=upload_registry,
+    )
 
 
-def calculate_price(variant: Dict, base_price: float | None, profit_percent: float | None) -> int:
-    if base_price is not None:
-        return int(round(base_price * 100))
-    cost_cents = int(variant.get("cost", 1000))
-    margin = float(profit_percent or 30) / 100
-    return int(round(cost_cents * (1 + margin)))
+def get_async_printify_from_config(config: Dict) -> AsyncPrintifyClient:
+    return AsyncPrintifyClient(
+        *printify_credentials(config),
+        base_url=settings.printify_base_url,
+        scheduler=printify_scheduler,
+        catalog=catalog_cache,
+        uploads=upload_registry,
+    )
 
 
-def ensure_variant_selection(config: Dict, printify: PrintifyClient) -> List[Dict]:
-    selected = config.get("selected_variants", [])
-    if not selected:
-        variants = printify.get_variants(int(config["blueprint_id"]), int(config["print_provider_id"]))
-        selected = [{"variant_id": v["id"], "enabled": True, "price": v.get("price", 1999), "cost": v.get("cost")} for v in variants[:100]]
+def ensure_variant_selection(config: Dict, pricing: PricingEngine, printify: PrintifyClient) -> List[Dict]:
+    if pricing.has_selection:
+        return pricing.selection()
+    return pricing.default_selection(printify.get_variants(int(config["blueprint_id"]), int(config["print_provider_id"])))
 
-    if len(selected) > 100:
-        raise RuntimeError("Variant selection exceeds Printify limit of 100")
 
-    normalized = []
-    for v in selected:
-        normalized.append(
-            {
-                "variant_id": int(v["variant_id"]),
-                "enabled": bool(v.get("enabled", True)),
-                "price": int(v.get("price") or calculate_price(v, config.get("base_price"), config.get("profit_percent"))),
-            }
-        )
-    return normalized
+async def load_snapshot(db: Session, profile: Optional[str] = None) -> SettingsSnapshot:
+    """``ConfigStore.snapshot`` for ``async def`` routes; a cache miss queries the database, so it runs off the event loop."""
+    return await run_in_threadpool(ConfigStore(db).snapshot, profile)
 
 
-def run_processor(image_path: str):
-    db = SessionLocal()
-    try:
-        config = ConfigStore(db).get("settings", {})
-    finally:
-        db.close()
+async def ensure_variant_selection_async(config: Dict, pricing: PricingEngine, printify: AsyncPrintifyClient) -> List[Dict]:
+    if pricing.has_selection:
+        return pricing.selection()
+    variants = await printify.get_variants(int(config["blueprint_id"]), int(config["print_provider_id"]))
+    return pricing.default_selection(variants)
 
-    if not config.get("blueprint_id") or not config.get("print_provider_id"):
+
+def job_settings(job: PipelineJob) -> SettingsSnapshot:
+    # Taken once per run, so a settings change mid-batch only affects runs that have not started.
+    if job.settings is None:
+        db = SessionLocal()
+        try:
+            job.settings = ConfigStore(db).snapshot(job.profile)
+        finally:
+            db.close()
+
+    if not job.settings.data.get("blueprint_id") or not job.settings.data.get("print_provider_id"):
         raise RuntimeError("Blueprint ID and Print Provider ID are required")
+    return job.settings
+
 
-    printify = get_printify_from_config(config)
+def listing_description(listing: Dict) -> str:
+    return f"{' '.join(listing['bullets'])}\n\n{listing['description']}"
 
-    analysis = ai_service.analyze_image(image_path)
-    listing = ai_service.generate_listing(analysis)
-    upload = printify.upload_image(image_path)
-    variants = ensure_variant_selection(config, printify)
 
-    description = f"{' '.join(listing['bullets'])}\n\n{listing['description']}"
-    product = printify.create_draft_product(
+def create_draft(snapshot: SettingsSnapshot, printify: PrintifyClient, listing: Dict, upload_id: str) -> Dict:
+    config = snapshot.data
+    return printify.create_draft_product(
         title=listing["title"],
-        description=description,
+        description=listing_description(listing),
         tags=listing["tags"],
         blueprint_id=int(config["blueprint_id"]),
         provider_id=int(config["print_provider_id"]),
-        uploaded_image_id=upload["id"],
-        variants=variants,
+        uploaded_image_id=upload_id,
+        variants=ensure_variant_selection(config, snapshot.pricing, printify),
         mockup_ids=config.get("selected_mockups", []),
     )
 
-    return {
-        "analysis_json": json.dumps(analysis),
-        "listing_json": json.dumps(listing),
-        "printify_upload_id": upload.get("id"),
-        "printify_product_id": product.get("id"),
-    }
 
+async def create_draft_async(snapshot: SettingsSnapshot, printify: AsyncPrintifyClient, listing: Dict, upload_id: str) -> Dict:
+    config = snapshot.data
+    return await printify.create_draft_product(
+        title=listing["title"],
+        description=listing_description(listing),
+        tags=listing["tags"],
+        blueprint_id=int(config["blueprint_id"]),
+        provider_id=int(config["print_provider_id"]),
+        uploaded_image_id=upload_id,
+        variants=await ensure_variant_selection_async(config, snapshot.pricing, printify),
+        mockup_ids=config.get("selected_mockups", []),
+    )
 
-monitor_manager = MonitorManager(SessionLocal, run_processor)
 
+def prepare_stage(job: PipelineJob):
+    prepared = preprocessor.prepare(job.image_path, job.file_hash)
+    job.file_hash = prepared.file_hash
+    job.caption_path = prepared.caption_path
+
+
+def analyze_stage(job: PipelineJob):
+    job_settings(job)
+    if ai_service.combined:
+        job.analysis, job.listing = ai_service.analyze_and_generate(job.image_path, job.file_hash, job.cancel, job.caption_path)
+    else:
+        job.analysis = ai_service.analyze_image(job.image_path, job.file_hash, job.cancel, job.caption_path)
+
+
+def generate_stage(job: PipelineJob):
+    if job.listing is None:
+        job.listing = ai_service.generate_listing(job.analysis, job.cancel)
+
+
+def upload_stage(job: PipelineJob):
+    printify = get_printify_from_config(job_settings(job).data)
+    job.upload_id = printify.upload_image(job.image_path, job.file_hash)["id"]
+
+
+def draft_stage(job: PipelineJob):
+    snapshot = job_settings(job)
+    product = create_draft(snapshot, get_printify_from_config(snapshot.data), job.listing, job.upload_id)
+    job.product_id = product.get("id")
+
+
+pipeline = PipelineEngine(
+    SessionLocal,
+    handlers={"prepare": prepare_stage, "analyze": analyze_stage, "generate": generate_stage, "upload": upload_stage, "draft": draft_stage},
+    workers=settings.stage_limits,
+    queue_size=settings.pipeline_queue_size,
+    events=event_bus,
+)
+job_queue = JobQueue(SessionLocal, lease_seconds=settings.job_lease_seconds, max_attempts=settings.job_max_attempts)
+similar_designs = PerceptualIndex(settings.near_duplicate_threshold)
+monitor_manager = MonitorManager(
+    SessionLocal,
+    pipeline,
+    job_queue,
+    workers=settings.monitor_workers,
+    baseline_hash_workers=settings.baseline_hash_workers,
+    baseline_batch_size=settings.baseline_batch_size,
+    settle_min_delay_ms=settings.settle_min_delay_ms,
+    settle_max_delay_ms=settings.settle_max_delay_ms,
+    similar=similar_designs,
+    duplicate_action=settings.near_duplicate_action,
+)
+pipeline.on_complete = monitor_manager.finish_run
+batch_service = BatchService(SessionLocal, job_queue, max_items=settings.batch_max_items)
+
+
+def recover_jobs():
+    """Release intake leases held before a restart, resume runs that were mid-pipeline and
+    start the intake workers if jobs are still waiting."""
+    for run_id in job_queue.recover():
+        try:
+            pipeline.resume(run_id)
+        except (LookupError, ValueError):
+            continue
+    if any(job_queue.depths().values()):
+        monitor_manager.start_workers()
 
 
 @router.get("/health")
@@ -122,13 +262,64 @@ def reset_settings(db: Session = Depends(get_db)):
     return {"ok": True}
 
 
+@router.get("/profiles")
+def list_profiles(db: Session = Depends(get_db)):
+    return ConfigStore(db).get("profiles", {})
+
+
+@router.put("/profiles/{name}")
+def set_profile(name: str, overrides: Dict[str, Any], db: Session = Depends(get_db)):
+    store = ConfigStore(db)
+    unknown = set(overrides) - (set(SettingsPayload.model_fields) - {"watch_folder"})
+    if unknown:
+        raise HTTPException(400, f"Unsupported profile fields: {', '.join(sorted(unknown))}")
+    try:
+        merged = SettingsPayload(**{**store.get("settings", {}), **overrides}).model_dump()
+    except ValidationError as exc:
+        raise HTTPException(422, exc.errors())
+    if len(merged["selected_variants"]) > 100:
+        raise HTTPException(400, "Selected variants exceed 100")
+    profiles = store.get("profiles", {})
+    profiles[name] = {key: merged[key] for key in overrides}
+    store.set("profiles", profiles)
+    return {"ok": True, "profile": name}
+
+
+@router.delete("/profiles/{name}")
+def delete_profile(name: str, db: Session = Depends(get_db)):
+    store = ConfigStore(db)
+    profiles = store.get("profiles", {})
+    if name not in profiles:
+        raise HTTPException(404, f"Profile {name} not found")
+    if any(f.get("profile") == name for f in store.get("watch_folders", [])):
+        raise HTTPException(409, f"Profile {name} is used by a watch folder")
+    del profiles[name]
+    store.set("profiles", profiles)
+    return {"ok": True}
+
+
+@router.get("/watch-folders", response_model=List[WatchFolder])
+def get_watch_folders(db: Session = Depends(get_db)):
+    return ConfigStore(db).watch_folders()
+
+
+@router.post("/watch-folders")
+def set_watch_folders(folders: List[WatchFolder], db: Session = Depends(get_db)):
+    store = ConfigStore(db)
+    profiles = store.get("profiles", {})
+    missing = sorted({f.profile for f in folders if f.profile and f.profile not in profiles})
+    if missing:
+        raise HTTPException(400, f"Unknown profiles: {', '.join(missing)}")
+    store.set("watch_folders", [f.model_dump() for f in folders])
+    return {"ok": True}
+
+
 @router.post("/monitor/start")
 def start_monitor(db: Session = Depends(get_db)):
-    config = ConfigStore(db).get("settings", {})
-    folder = config.get("watch_folder")
-    if not folder:
+    folders = ConfigStore(db).watch_folders()
+    if not folders:
         raise HTTPException(400, "watch_folder is required")
-    monitor_manager.start(folder)
+    monitor_manager.start(folders)
     return {"ok": True}
 
 
@@ -140,21 +331,84 @@ def stop_monitor():
 
 @router.get("/monitor/status", response_model=StatusResponse)
 def monitor_status(db: Session = Depends(get_db)):
-    config = ConfigStore(db).get("settings", {})
+    store = ConfigStore(db)
+    source_queues = monitor_manager.queue_depths()
     return StatusResponse(
         monitoring=monitor_manager.running,
-        watch_folder=config.get("watch_folder", ""),
-        queue_size=monitor_manager.work_queue.qsize(),
-        current_file=monitor_manager.current_file,
+        watch_folder=store.get("settings", {}).get("watch_folder", ""),
+        watch_folders=store.watch_folders(),
+        queue_size=sum(source_queues.values()),
+        source_queues=source_queues,
+        settling=monitor_manager.settler.pending(),
+        stage_queues=pipeline.queue_depths(),
+        workers=[WorkerStatus(**w) for w in monitor_manager.worker_status() + pipeline.worker_status()],
+        baseline=monitor_manager.baseline_status(),
     )
 
 
 @router.post("/queue", response_model=QueueItemResponse)
 def queue_manual_image(payload: AnalyzeRequest):
     path = str(Path(payload.image_path))
-    if not monitor_manager.enqueue_path(path):
+    job_id = monitor_manager.enqueue_path(path)
+    if job_id is None:
         raise HTTPException(400, "Invalid image path or unsupported extension")
-    return QueueItemResponse(ok=True, queued_path=path)
+    monitor_manager.start_workers()
+    return QueueItemResponse(ok=True, queued_path=path, job_id=job_id)
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: int):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Job {job_id} not found")
+    return job
+
+
+@router.post("/similar")
+def find_similar_designs(payload: AnalyzeRequest):
+    """Designs that a file at ``image_path`` would be treated as a near-duplicate of."""
+    if not Path(payload.image_path).exists():
+        raise HTTPException(404, "Image path not found")
+    return {
+        "matches": monitor_manager.find_similar(payload.image_path),
+        "action": settings.near_duplicate_action,
+        "index": similar_designs.stats(),
+    }
+
+
+@router.post("/batches")
+def create_batch(payload: BatchRequest, db: Session = Depends(get_db)):
+    """Queue many images at once and return immediately; follow progress with ``GET /batches/{id}``."""
+    try:
+        ConfigStore(db).profile_settings(payload.profile or None)
+    except LookupError as exc:
+        raise HTTPException(400, str(exc))
+    try:
+        paths = expand_paths(payload.paths, payload.directory, payload.pattern, payload.recursive)
+        result = batch_service.create(paths, payload.profile, payload.priority, payload.name)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    monitor_manager.start_workers()
+    return result
+
+
+@router.get("/batches/{batch_id}")
+def get_batch(batch_id: int):
+    progress = batch_service.progress(batch_id)
+    if progress is None:
+        raise HTTPException(404, f"Batch {batch_id} not found")
+    return progress
+
+
+@router.get("/batches/{batch_id}/items")
+def stream_batch_items(batch_id: int, follow: bool = False, idle_timeout: float = Query(300, gt=0, le=3600)):
+    """Per-item results as NDJSON. ``follow=true`` emits each item as it finishes and ends with the batch,
+    or after ``idle_timeout`` seconds without progress."""
+    if batch_service.progress(batch_id) is None:
+        raise HTTPException(404, f"Batch {batch_id} not found")
+    items = batch_service.stream_items(batch_id, follow, idle_seconds=idle_timeout)
+    lines = (json.dumps(item) + "\n" for item in items)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 
 @router.post("/analyze")
@@ -162,99 +416,292 @@ def analyze_single(payload: AnalyzeRequest):
     image_path = payload.image_path
     if not Path(image_path).exists():
         raise HTTPException(404, "Image path not found")
-    analysis = ai_service.analyze_image(image_path)
-    listing = ai_service.generate_listing(analysis)
-    return {"analysis": analysis, "listing": listing}
+    prepared = preprocessor.prepare(image_path)
+    if ai_service.combined:
+        analysis, listing = ai_service.analyze_and_generate(image_path, prepared.file_hash, None, prepared.caption_path)
+    else:
+        analysis = ai_service.analyze_image(image_path, prepared.file_hash, None, prepared.caption_path)
+        listing = ai_service.generate_listing(analysis)
+    return {"analysis": analysis, "listing": listing, "thumbnail": thumbnail_url(prepared.file_hash)}
+
+
+@router.get("/ai/status")
+def ai_status():
+    return {
+        "captioner": ai_service.caption_worker.stats(),
+        "ollama": ai_service.ollama_stats(),
+        "cache": ai_service.cache.stats() if ai_service.cache else None,
+        "preprocess": preprocessor.stats(),
+    }
 
 
 @router.post("/draft")
-def draft_single(payload: DraftRequest, db: Session = Depends(get_db)):
-    config = ConfigStore(db).get("settings", {})
-    printify = get_printify_from_config(config)
+async def draft_single(payload: DraftRequest, db: Session = Depends(get_db)):
+    snapshot = await load_snapshot(db)
+    printify = get_async_printify_from_config(snapshot.data)
 
     if not Path(payload.image_path).exists():
         raise HTTPException(404, "Image path not found")
 
-    analysis = payload.analysis or ai_service.analyze_image(payload.image_path)
-    listing = payload.listing or ai_service.generate_listing(analysis)
-
-    upload = printify.upload_image(payload.image_path)
-    variants = ensure_variant_selection(config, printify)
+    analysis = payload.analysis or await run_in_threadpool(ai_service.analyze_image, payload.image_path)
+    listing = payload.listing or await run_in_threadpool(ai_service.generate_listing, analysis)
 
-    description = f"{' '.join(listing['bullets'])}\n\n{listing['description']}"
-    product = printify.create_draft_product(
-        title=listing["title"],
-        description=description,
-        tags=listing["tags"],
-        blueprint_id=int(config["blueprint_id"]),
-        provider_id=int(config["print_provider_id"]),
-        uploaded_image_id=upload["id"],
-        variants=variants,
-        mockup_ids=config.get("selected_mockups", []),
-    )
+    upload = await printify.upload_image(payload.image_path)
+    product = await create_draft_async(snapshot, printify, listing, upload["id"])
 
     return {"ok": True, "printify_upload_id": upload.get("id"), "printify_product_id": product.get("id")}
 
 
 @router.get("/printify/variants")
-def fetch_variants(blueprint_id: int, print_provider_id: int, db: Session = Depends(get_db)):
-    config = ConfigStore(db).get("settings", {})
-    client = get_printify_from_config(config)
-    return {"variants": client.get_variants(blueprint_id, print_provider_id)}
+async def fetch_variants(blueprint_id: int, print_provider_id: int, db: Session = Depends(get_db)):
+    client = get_async_printify_from_config((await load_snapshot(db)).data)
+    return {"variants": await client.get_variants(blueprint_id, print_provider_id)}
 
 
 @router.get("/printify/mockups")
-def fetch_mockups(blueprint_id: int, print_provider_id: int, db: Session = Depends(get_db)):
-    config = ConfigStore(db).get("settings", {})
-    client = get_printify_from_config(config)
-    return {"mockups": client.get_mockup_candidates(blueprint_id, print_provider_id)}
+async def fetch_mockups(blueprint_id: int, print_provider_id: int, db: Session = Depends(get_db)):
+    client = get_async_printify_from_config((await load_snapshot(db)).data)
+    return {"mockups": await client.get_mockup_candidates(blueprint_id, print_provider_id)}
+
+
+@router.post("/pricing/dry-run")
+async def pricing_dry_run(payload: PricingDryRunRequest, db: Session = Depends(get_db)):
+    """Price every variant of the given catalogs (default: the configured one) without creating anything."""
+    try:
+        snapshot = await load_snapshot(db, payload.profile or None)
+    except LookupError as exc:
+        raise HTTPException(400, str(exc))
+    overrides = payload.model_dump(include={"base_price", "profit_percent", "pricing_rules"}, exclude_none=True)
+    pricing = PricingEngine({**snapshot.data, **overrides, "selected_variants": []}) if overrides else snapshot.pricing
+
+    catalogs = [(c.blueprint_id, c.print_provider_id) for c in payload.catalogs]
+    if not catalogs:
+        if not snapshot.data.get("blueprint_id") or not snapshot.data.get("print_provider_id"):
+            raise HTTPException(400, "Blueprint ID and Print Provider ID are required")
+        catalogs = [(int(snapshot.data["blueprint_id"]), int(snapshot.data["print_provider_id"]))]
+
+    client = get_async_printify_from_config(snapshot.data)
+    fetched = await asyncio.gather(*(client.get_variants(b, p) for b, p in catalogs))
+    # One pass over every catalog's variants, so NumPy (when installed) prices them together.
+    owners = [(b, p) for (b, p), variants in zip(catalogs, fetched) for _ in variants]
+    quotes = pricing.quote([v for variants in fetched for v in variants])
+    for (blueprint_id, provider_id), quote in zip(owners, quotes):
+        quote["blueprint_id"], quote["print_provider_id"] = blueprint_id, provider_id
+    prices = [q["price"] for q in quotes]
+    return {
+        "count": len(quotes),
+        "min_price": min(prices, default=None),
+        "max_price": max(prices, default=None),
+        "variants": quotes,
+    }
+
+
+@router.get("/printify/catalog")
+def catalog_cache_stats():
+    return {**catalog_cache.stats(), "draft_templates": draft_templates.stats()}
+
+
+@router.post("/printify/catalog/invalidate")
+def invalidate_catalog_cache(blueprint_id: Optional[int] = None, print_provider_id: Optional[int] = None):
+    removed = catalog_cache.invalidate(blueprint_id, print_provider_id)
+    return {"ok": True, "invalidated": removed}
+
+
+@router.get("/printify/rate-limits")
+def printify_rate_limits():
+    return printify_scheduler.snapshot()
+
+
+def as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC; convert offset-aware query values to match."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def prefix_range(column, prefix: str):
+    """``column LIKE 'prefix%'`` written as a range so SQLite can use the column's index."""
+    return and_(column >= prefix, column < prefix + "\U0010ffff")
 
 
 @router.get("/runs")
-def list_runs(db: Session = Depends(get_db)):
-    runs = db.query(ProductRun).order_by(ProductRun.id.desc()).limit(100).all()
-    return [
-        {
-            "id": r.id,
-            "image_path": r.image_path,
-            "status": r.status,
-            "success": r.success,
-            "printify_upload_id": r.printify_upload_id,
-            "printify_product_id": r.printify_product_id,
-            "analysis": json.loads(r.analysis_json) if r.analysis_json else None,
-            "listing": json.loads(r.listing_json) if r.listing_json else None,
-            "error_message": r.error_message,
-            "created_at": r.created_at.isoformat(),
-        }
-        for r in runs
-    ]
+def list_runs(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    before_id: Optional[int] = None,
+    status: Optional[str] = None,
+    path_prefix: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_json: bool = True,
+    db: Session = Depends(get_db),
+):
+    """Newest runs first. Pass the ``X-Next-Cursor`` header back as ``before_id`` for the next page."""
+    query = db.query(ProductRun)
+    if not include_json:
+        query = query.options(defer(ProductRun.analysis_json), defer(ProductRun.listing_json))
+    if before_id is not None:
+        query = query.filter(ProductRun.id < before_id)
+    if status:
+        query = query.filter(ProductRun.status == status)
+    if path_prefix:
+        query = query.filter(prefix_range(ProductRun.image_path, path_prefix))
+    if since:
+        query = query.filter(ProductRun.created_at >= as_naive_utc(since))
+    if until:
+        query = query.filter(ProductRun.created_at < as_naive_utc(until))
+    runs = query.order_by(ProductRun.id.desc()).limit(limit).all()
+    if len(runs) == limit:
+        response.headers["X-Next-Cursor"] = str(runs[-1].id)
+
+    items = []
+    for r in runs:
+        item = run_summary(r)
+        if include_json:
+            item["analysis"] = json.loads(r.analysis_json) if r.analysis_json else None
+            item["listing"] = json.loads(r.listing_json) if r.listing_json else None
+        items.append(item)
+    return items
+
+
+@router.post("/runs/{run_id}/retry")
+def retry_run(run_id: int):
+    try:
+        stage = pipeline.resume(run_id)
+    except LookupError as exc:
+        raise HTTPException(404, str(exc))
+    except ValueError as exc:
+        raise HTTPException(409, str(exc))
+    return {"ok": True, "run_id": run_id, "stage": stage}
+
+
+@router.post("/runs/{run_id}/abort")
+def abort_run(run_id: int):
+    if not pipeline.abort(run_id):
+        raise HTTPException(409, f"Run {run_id} is not queued or running")
+    return {"ok": True, "run_id": run_id}
 
 
 @router.get("/logs")
-def list_logs(db: Session = Depends(get_db)):
-    logs = db.query(ProcessingLog).order_by(ProcessingLog.id.desc()).limit(200).all()
-    return [
-        {
+def list_logs(
+    response: Response,
+    limit: int = Query(200, ge=1, le=1000),
+    before_id: Optional[int] = None,
+    level: Optional[str] = None,
+    path_prefix: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_json: bool = True,
+    db: Session = Depends(get_db),
+):
+    """Newest logs first, paged like ``/runs``."""
+    query = db.query(ProcessingLog)
+    if not include_json:
+        query = query.options(defer(ProcessingLog.details))
+    if before_id is not None:
+        query = query.filter(ProcessingLog.id < before_id)
+    if level:
+        query = query.filter(ProcessingLog.level == level.upper())
+    if path_prefix:
+        query = query.filter(prefix_range(ProcessingLog.image_path, path_prefix))
+    if since:
+        query = query.filter(ProcessingLog.created_at >= as_naive_utc(since))
+    if until:
+        query = query.filter(ProcessingLog.created_at < as_naive_utc(until))
+    logs = query.order_by(ProcessingLog.id.desc()).limit(limit).all()
+    if len(logs) == limit:
+        response.headers["X-Next-Cursor"] = str(logs[-1].id)
+
+    items = []
+    for l in logs:
+        item = {
             "id": l.id,
             "level": l.level,
             "message": l.message,
             "image_path": l.image_path,
-            "details": l.details,
             "created_at": l.created_at.isoformat(),
         }
-        for l in logs
-    ]
+        if include_json:
+            item["details"] = l.details
+        items.append(item)
+    return items
 
 
 @router.get("/dashboard")
 def dashboard_stats(db: Session = Depends(get_db)):
-    total = db.query(func.count(ProductRun.id)).scalar() or 0
-    drafts = db.query(func.count(ProductRun.id)).filter(ProductRun.success.is_(True)).scalar() or 0
-    total_logs = db.query(func.count(ProcessingLog.id)).scalar() or 0
-    error_logs = db.query(func.count(ProcessingLog.id)).filter(ProcessingLog.level == "ERROR").scalar() or 0
+    values = counters(db)
+    last_hour = window_totals(db, ("runs_succeeded", "runs_failed"), datetime.utcnow() - timedelta(hours=1))
+    finished = last_hour["runs_succeeded"] + last_hour["runs_failed"]
     return {
-        "total_products": total,
-        "draft_products": drafts,
-        "total_logs": total_logs,
-        "error_logs": error_logs,
+        "total_products": values["runs_created"],
+        "draft_products": values["runs_succeeded"],
+        "failed_products": values["runs_failed"],
+        "total_logs": values["logs"],
+        "error_logs": values["logs_error"],
+        "drafts_last_hour": last_hour["runs_succeeded"],
+        "error_rate_last_hour": round(last_hour["runs_failed"] / finished, 3) if finished else 0.0,
     }
+
+
+@router.get("/dashboard/series")
+def dashboard_series(hours: int = Query(24, ge=1, le=24 * 30), db: Session = Depends(get_db)):
+    since = datetime.utcnow() - timedelta(hours=hours)
+    return {"bucket_seconds": settings.stats_bucket_seconds, "series": series(db, COUNTERS, since)}
+
+
+@router.post("/dashboard/reconcile")
+def dashboard_reconcile(db: Session = Depends(get_db)):
+    """Recount the dashboard totals from the runs and logs tables."""
+    return reconcile(db)
+
+
+def snapshot(view):
+    def source():
+        db = SessionLocal()
+        try:
+            result = view(db)
+            return result.model_dump(mode="json") if isinstance(result, StatusResponse) else result
+        finally:
+            db.close()
+
+    return source
+
+
+# Queue depths, worker state and dashboard totals are polled once for all connected clients.
+status_feed = SnapshotFeed(
+    event_bus,
+    {"status": snapshot(monitor_status), "dashboard": snapshot(dashboard_stats)},
+    interval_ms=settings.event_status_interval_ms,
+)
+
+
+@router.get("/events")
+async def stream_events():
+    """Server-Sent Events: ``run`` and ``logs`` as they are committed, ``status`` and ``dashboard`` when they change.
+
+    A ``resync`` event means the client fell too far behind and should reload over REST.
+    """
+
+    async def stream():
+        subscription = event_bus.subscribe()
+        status_feed.ensure_running()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.get(), settings.event_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/events/stats")
+def event_stats():
+    return event_bus.stats()
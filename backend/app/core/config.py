@@ -5,13 +5,69 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     app_name: str = "Printify Product Automation"
     database_path: str = "./data/app.db"
+    sqlite_busy_timeout_ms: int = 10000
+    sqlite_cache_size_kb: int = 65536
+    sqlite_mmap_size: int = 268435456
+    log_batch_size: int = 200
+    log_flush_interval_ms: int = 250
+    stats_bucket_seconds: int = 300
+    event_queue_size: int = 500
+    event_status_interval_ms: int = 1000
+    event_keepalive_seconds: int = 15
     storage_dir: str = "./data"
     printify_api_key: str = ""
     printify_shop_id: str = ""
+    printify_base_url: str = "https://api.printify.com/v1"
+    printify_rate_global_per_minute: int = 600
+    printify_rate_catalog_per_minute: int = 100
+    printify_rate_upload_per_minute: int = 200
+    printify_rate_product_per_minute: int = 60
+    printify_max_retries: int = 5
+    catalog_cache_ttl_seconds: int = 3600
+    catalog_cache_max_entries: int = 256
     ollama_model: str = "llama3.1:8b"
+    ollama_combined: bool = False
+    ollama_keep_alive: str = "30m"
+    ollama_host: str = ""
+    ollama_num_parallel: int = 1
+    ollama_request_timeout: float = 300
+    caption_batch_size: int = 8
+    caption_max_wait_ms: int = 50
+    caption_threads: int = 0
+    ai_cache_max_entries: int = 10000
+    caption_image_size: int = 384
+    thumbnail_size: int = 256
+
+    monitor_workers: int = 2
+    job_lease_seconds: int = 300
+    job_max_attempts: int = 3
+    batch_max_items: int = 10000
+    hash_algorithm: str = "sha256"
+    near_duplicate_threshold: int = 10
+    near_duplicate_action: str = "off"
+    baseline_hash_workers: int = 4
+    baseline_batch_size: int = 500
+    settle_min_delay_ms: int = 50
+    settle_max_delay_ms: int = 2000
+    pipeline_queue_size: int = 8
+    prepare_concurrency: int = 2
+    analyze_concurrency: int = 8
+    generate_concurrency: int = 2
+    upload_concurrency: int = 4
+    draft_concurrency: int = 4
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
+    @property
+    def stage_limits(self) -> dict:
+        return {
+            "prepare": self.prepare_concurrency,
+            "analyze": self.analyze_concurrency,
+            "generate": self.generate_concurrency,
+            "upload": self.upload_concurrency,
+            "draft": self.draft_concurrency,
+        }
+
     @property
     def database_url(self) -> str:
         path = Path(self.database_path)
@@ -1,9 +1,14 @@
+import threading
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from backend.app.api.routes import router
-from backend.app.core.database import Base, engine
+from backend.app.api.routes import preprocessor, recover_jobs, router
+from backend.app.core.database import SessionLocal, sync_schema
+from backend.app.services.logger import log_writer
+from backend.app.services.printify_service import close_async_client
+from backend.app.services.stats import initialize as initialize_stats
 
 app = FastAPI(title="Printify Product Automation")
 
@@ -14,7 +19,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-Base.metadata.create_all(bind=engine)
+sync_schema()
+initialize_stats(SessionLocal)
+
+
+@app.on_event("startup")
+def resume_jobs():
+    threading.Thread(target=recover_jobs, name="job-recovery", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown_clients():
+    await close_async_client()
+    log_writer.flush()
+
 
 app.include_router(router, prefix="/api")
+app.mount("/thumbs", StaticFiles(directory=preprocessor.thumbnail_dir), name="thumbs")
 app.mount("/", StaticFiles(directory="frontend", html=True), name="frontend")
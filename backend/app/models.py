@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Index, Integer, String, Text, UniqueConstraint
 
 from backend.app.core.database import Base
 
@@ -20,6 +20,11 @@ class ProcessedImage(Base):
     id = Column(Integer, primary_key=True, index=True)
     path = Column(String(500), unique=True, nullable=False)
     file_hash = Column(String(128), index=True, nullable=False)
+    file_size = Column(BigInteger, nullable=True)
+    mtime_ns = Column(BigInteger, nullable=True)
+    inode = Column(BigInteger, nullable=True)
+    perceptual_hash = Column(String(64), nullable=True)
+    duplicate_of = Column(Integer, nullable=True)
     status = Column(String(30), nullable=False, default="queued")
     message = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -28,6 +33,11 @@ class ProcessedImage(Base):
 
 class ProcessingLog(Base):
     __tablename__ = "processing_logs"
+    __table_args__ = (
+        Index("ix_processing_logs_level_id", "level", "id"),
+        Index("ix_processing_logs_created_at", "created_at"),
+        Index("ix_processing_logs_image_path", "image_path"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     image_path = Column(String(500), nullable=True)
@@ -39,12 +49,21 @@ class ProcessingLog(Base):
 
 class ProductRun(Base):
     __tablename__ = "product_runs"
+    __table_args__ = (
+        Index("ix_product_runs_status_id", "status", "id"),
+        Index("ix_product_runs_file_hash", "file_hash"),
+        Index("ix_product_runs_created_at", "created_at"),
+        Index("ix_product_runs_image_path", "image_path"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     image_path = Column(String(500), nullable=False)
     file_hash = Column(String(128), nullable=True)
+    profile = Column(String(100), nullable=True)
     status = Column(String(30), default="queued")
     success = Column(Boolean, default=False)
+    stage = Column(String(30), nullable=True)
+    stage_status = Column(Text, nullable=True)
 
     analysis_json = Column(Text, nullable=True)
     listing_json = Column(Text, nullable=True)
@@ -55,3 +74,92 @@ class ProductRun(Base):
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CatalogCacheEntry(Base):
+    __tablename__ = "catalog_cache"
+    __table_args__ = (UniqueConstraint("kind", "blueprint_id", "provider_id", name="uq_catalog_cache_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(30), nullable=False)
+    blueprint_id = Column(Integer, nullable=False)
+    provider_id = Column(Integer, nullable=False)
+    etag = Column(String(200), nullable=True)
+    payload = Column(Text, nullable=False)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PrintifyUpload(Base):
+    __tablename__ = "printify_uploads"
+    __table_args__ = (UniqueConstraint("file_hash", "shop_id", name="uq_printify_upload_hash"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_hash = Column(String(128), nullable=False)
+    shop_id = Column(String(50), nullable=False)
+    upload_id = Column(String(100), nullable=False)
+    file_name = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AICacheEntry(Base):
+    __tablename__ = "ai_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(30), nullable=False)
+    cache_key = Column(String(128), unique=True, nullable=False)
+    value = Column(Text, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String(500), nullable=False, index=True)
+    source = Column(String(500), nullable=False)
+    profile = Column(String(100), nullable=True)
+    status = Column(String(20), nullable=False, default="pending")
+    stage = Column(String(30), nullable=False, default="intake")
+    priority = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    leased_by = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    run_id = Column(Integer, nullable=True, index=True)
+    batch_id = Column(Integer, nullable=True, index=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Matches the claim query: pending jobs of one source, highest priority first, then oldest.
+Index("ix_jobs_claim", Job.status, Job.source, Job.priority.desc(), Job.id)
+
+
+class Batch(Base):
+    __tablename__ = "batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=True)
+    profile = Column(String(100), nullable=True)
+    total = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(50), unique=True, nullable=False)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class StatBucket(Base):
+    __tablename__ = "stat_buckets"
+    __table_args__ = (UniqueConstraint("name", "bucket_start", name="uq_stat_bucket"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(50), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    value = Column(BigInteger, nullable=False, default=0)
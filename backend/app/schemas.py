@@ -6,7 +6,16 @@ from pydantic import BaseModel, Field
 class VariantSelection(BaseModel):
     variant_id: int
     enabled: bool = True
-    price: int = 1999
+    # Cents; replaces the computed base price when set. Pricing rules apply either way.
+    price: Optional[int] = None
+    cost: Optional[float] = None
+    options: Dict[str, Any] = Field(default_factory=dict)
+
+
+class PricingRules(BaseModel):
+    size_markup_percent: Dict[str, float] = Field(default_factory=dict)
+    min_margin_percent: Optional[float] = None
+    round_to_99: bool = False
 
 
 class SettingsPayload(BaseModel):
@@ -19,6 +28,7 @@ class SettingsPayload(BaseModel):
 
     base_price: Optional[float] = None
     profit_percent: Optional[float] = 30.0
+    pricing_rules: PricingRules = Field(default_factory=PricingRules)
 
     selected_variants: List[VariantSelection] = Field(default_factory=list)
     selected_mockups: List[str] = Field(default_factory=list)
@@ -26,11 +36,28 @@ class SettingsPayload(BaseModel):
     copy_previous: bool = True
 
 
+class WatchFolder(BaseModel):
+    path: str
+    recursive: bool = False
+    profile: str = ""
+
+
+class WorkerStatus(BaseModel):
+    worker: str
+    current_file: Optional[str] = None
+    stage: Optional[str] = None
+
+
 class StatusResponse(BaseModel):
     monitoring: bool
     watch_folder: str
+    watch_folders: List[WatchFolder] = Field(default_factory=list)
     queue_size: int
-    current_file: Optional[str] = None
+    source_queues: Dict[str, int] = Field(default_factory=dict)
+    settling: int = 0
+    stage_queues: Dict[str, int] = Field(default_factory=dict)
+    workers: List[WorkerStatus] = Field(default_factory=list)
+    baseline: List[Dict[str, Any]] = Field(default_factory=list)
 
 
 class AnalysisOutput(BaseModel):
@@ -59,6 +86,30 @@ class DraftRequest(BaseModel):
     listing: Optional[Dict[str, Any]] = None
 
 
+class BatchRequest(BaseModel):
+    paths: List[str] = Field(default_factory=list)
+    directory: Optional[str] = None
+    pattern: str = "*"
+    recursive: bool = False
+    profile: str = ""
+    priority: int = 0
+    name: str = ""
+
+
+class CatalogRef(BaseModel):
+    blueprint_id: int
+    print_provider_id: int
+
+
+class PricingDryRunRequest(BaseModel):
+    catalogs: List[CatalogRef] = Field(default_factory=list)
+    profile: str = ""
+    base_price: Optional[float] = None
+    profit_percent: Optional[float] = None
+    pricing_rules: Optional[PricingRules] = None
+
+
 class QueueItemResponse(BaseModel):
     ok: bool
     queued_path: str
+    job_id: Optional[int] = None
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.app.models import AICacheEntry
+
+
+def cache_key(*parts) -> str:
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AIResultCache:
+    """Persistent cache of image analyses and listings, evicting least-recently-used rows past ``max_entries``."""
+
+    def __init__(self, db_factory: Callable[[], Session], max_entries: int = 10000):
+        self.db_factory = db_factory
+        self.max_entries = max(1, max_entries)
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, key: str) -> Optional[Dict]:
+        db = self.db_factory()
+        try:
+            row = db.query(AICacheEntry).filter(AICacheEntry.cache_key == key).first()
+            if row is None:
+                self._count(self.misses, kind)
+                return None
+            row.hits = (row.hits or 0) + 1
+            row.last_used_at = datetime.utcnow()
+            db.commit()
+            self._count(self.hits, kind)
+            return json.loads(row.value)
+        finally:
+            db.close()
+
+    def put(self, kind: str, key: str, value: Dict):
+        db = self.db_factory()
+        try:
+            db.add(AICacheEntry(kind=kind, cache_key=key, value=json.dumps(value)))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return
+            with self._lock:
+                if self._size is None:
+                    self._size = db.query(func.count(AICacheEntry.id)).scalar() or 0
+                else:
+                    self._size += 1
+                overflow = self._size - self.max_entries
+            if overflow > 0:
+                self._evict(db, overflow)
+        finally:
+            db.close()
+
+    def _evict(self, db: Session, count: int):
+        stale = (
+            db.query(AICacheEntry.id)
+            .order_by(AICacheEntry.last_used_at.asc(), AICacheEntry.id.asc())
+            .limit(count)
+            .subquery()
+        )
+        removed = db.query(AICacheEntry).filter(AICacheEntry.id.in_(stale.select())).delete(synchronize_session=False)
+        db.commit()
+        with self._lock:
+            self._size = max(0, (self._size or 0) - removed)
+
+    def _count(self, counter: Dict[str, int], kind: str):
+        with self._lock:
+            counter[kind] = counter.get(kind, 0) + 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_entries": self.max_entries,
+                "entries": self._size,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+            }
@@ -1,62 +1,219 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import threading
+from concurrent.futures import CancelledError
+from concurrent.futures import TimeoutError as FutureTimeout
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import ollama
-from PIL import Image
+
+from backend.app.services.ai_cache import AIResultCache, cache_key
+from backend.app.services.captioner import CaptionWorker
+from backend.app.services.hashing import file_digest
 
 
 class LocalAIService:
     """AI service with graceful fallback when BLIP or Ollama is unavailable."""
 
-    def __init__(self, ollama_model: str):
+    # Bump when a prompt changes so cached results from the old prompt are not reused.
+    ANALYSIS_PROMPT_VERSION = "1"
+    LISTING_PROMPT_VERSION = "1"
+
+    def __init__(
+        self,
+        ollama_model: str,
+        caption_worker: CaptionWorker | None = None,
+        cache: AIResultCache | None = None,
+        combined: bool = False,
+        keep_alive: str | None = None,
+        ollama_host: str | None = None,
+        max_in_flight: int = 1,
+        request_timeout: float = 300,
+    ):
         self.ollama_model = ollama_model
-        self._captioner = None
-        self._captioner_error: str | None = None
+        self.caption_worker = caption_worker or CaptionWorker()
+        self.cache = cache
+        self.combined = combined
+        self.keep_alive = keep_alive or None
+        self.ollama_host = ollama_host or None
+        self.max_in_flight = max(1, max_in_flight)
+        self.request_timeout = request_timeout
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_lock = threading.Lock()
+        self._client: ollama.AsyncClient | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._in_flight = 0
+        self._waiting = 0
+
+    def _caption_image(self, image_path: str, caption_path: str | None = None) -> str:
+        """Caption ``caption_path`` (a prepared downscaled copy) when given, else the original file."""
+        if not self.caption_worker.available:
+            return Path(image_path).stem.replace("_", " ").replace("-", " ").strip() or "design"
+        return self.caption_worker.submit(caption_path or image_path).result()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """All Ollama requests run on one background event loop, whatever thread asks for them."""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="ollama-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
 
-    @property
-    def captioner(self):
-        if self._captioner is not None or self._captioner_error is not None:
-            return self._captioner
+    async def _generate_async(self, prompt: str) -> str:
+        if self._client is None:
+            self._client = ollama.AsyncClient(host=self.ollama_host, timeout=self.request_timeout)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
 
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
         try:
-            from transformers import pipeline  # type: ignore
+            response = await self._client.generate(
+                model=self.ollama_model, prompt=prompt, format="json", keep_alive=self.keep_alive
+            )
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+        return response.get("response", "{}")
 
-            self._captioner = pipeline("image-to-text", model="Salesforce/blip-image-captioning-base")
-        except Exception as exc:
-            self._captioner_error = str(exc)
-            self._captioner = None
+    def _ollama_json(self, prompt: str, cancel: threading.Event | None = None) -> Dict:
+        """Run a JSON generation; raises ``CancelledError`` if ``cancel`` is set while waiting."""
+        future = asyncio.run_coroutine_threadsafe(self._generate_async(prompt), self._ensure_loop())
+        while True:
+            try:
+                raw = future.result(timeout=0.25)
+                break
+            except FutureTimeout:
+                if cancel is not None and cancel.is_set():
+                    future.cancel()
+                    raise CancelledError("Run aborted")
+            except Exception:
+                return {}
+        return self._safe_json(raw)
 
-        return self._captioner
+    def ollama_stats(self) -> Dict:
+        return {
+            "model": self.ollama_model,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "combined": self.combined,
+        }
 
-    def _caption_image(self, image_path: str) -> str:
-        captioner = self.captioner
-        if captioner is None:
-            return Path(image_path).stem.replace("_", " ").replace("-", " ").strip() or "design"
+    def _caption_source(self) -> str:
+        return "blip" if self.caption_worker.available else "filename"
 
-        image = Image.open(image_path).convert("RGB")
-        result = captioner(image)
-        return result[0].get("generated_text", "") if result else ""
+    def _analysis_key(self, image_path: str, file_hash: str | None) -> str:
+        # The caption source is part of the key so filename-based analyses are redone once BLIP is installed.
+        return cache_key(
+            "analysis",
+            file_hash or file_digest(image_path),
+            self.ollama_model,
+            self.ANALYSIS_PROMPT_VERSION,
+            self._caption_source(),
+        )
 
-    def _ollama_json(self, prompt: str) -> Dict:
-        try:
-            raw = ollama.generate(model=self.ollama_model, prompt=prompt).get("response", "{}")
-        except Exception:
-            return {}
-        return self._safe_json(raw)
+    def _listing_key(self, analysis: Dict) -> str:
+        return cache_key("listing", analysis, self.ollama_model, self.LISTING_PROMPT_VERSION)
+
+    def _cache_put(self, kind: str, key: str | None, value: Dict):
+        if self.cache is not None and key is not None and not self._degraded(value):
+            self.cache.put(kind, key, value)
 
-    def analyze_image(self, image_path: str) -> Dict:
-        caption = self._caption_image(image_path)
+    def analyze_image(
+        self,
+        image_path: str,
+        file_hash: str | None = None,
+        cancel: threading.Event | None = None,
+        caption_path: str | None = None,
+    ) -> Dict:
+        key = None
+        if self.cache is not None:
+            key = self._analysis_key(image_path, file_hash)
+            cached = self.cache.get("analysis", key)
+            if cached is not None:
+                return cached
+
+        caption = self._caption_image(image_path, caption_path)
 
         prompt = (
             "Return strict JSON only with keys: theme, objects(array), style, mood, target_audience. "
             "You are classifying design intent for print-on-demand ecommerce. "
             f"Caption: {caption}"
         )
-        parsed = self._ollama_json(prompt)
+        result = self._build_analysis(caption, self._ollama_json(prompt, cancel))
+        self._cache_put("analysis", key, result)
+        return result
+
+    def generate_listing(self, analysis: Dict, cancel: threading.Event | None = None) -> Dict:
+        key = None
+        if self.cache is not None:
+            key = self._listing_key(analysis)
+            cached = self.cache.get("listing", key)
+            if cached is not None:
+                return cached
+
+        prompt = (
+            "Return strict JSON only with keys: title(string), bullets(array of 5 strings), description(string), tags(array of <=10 short strings). "
+            "Generate natural, human-sounding, Amazon-optimized copy for a POD apparel listing. "
+            f"Input analysis: {json.dumps(analysis)}"
+        )
+        listing = self._build_listing(analysis, self._ollama_json(prompt, cancel))
+        self._cache_put("listing", key, listing)
+        return listing
+
+    def analyze_and_generate(
+        self,
+        image_path: str,
+        file_hash: str | None = None,
+        cancel: threading.Event | None = None,
+        caption_path: str | None = None,
+    ) -> Tuple[Dict, Dict]:
+        """Produce the analysis and the listing from a single Ollama call.
+
+        Results are cached under the same keys as ``analyze_image``/``generate_listing``,
+        so the two modes share cache entries.
+        """
+        analysis_key = None
+        if self.cache is not None:
+            analysis_key = self._analysis_key(image_path, file_hash)
+            analysis = self.cache.get("analysis", analysis_key)
+            if analysis is not None:
+                return analysis, self.generate_listing(analysis, cancel)
+
+        caption = self._caption_image(image_path, caption_path)
+        prompt = (
+            "Return strict JSON only with two keys. "
+            '"analysis": object with keys theme, objects(array), style, mood, target_audience, '
+            "classifying the design intent for print-on-demand ecommerce. "
+            '"listing": object with keys title(string), bullets(array of 5 strings), description(string), '
+            "tags(array of <=10 short strings), with natural, human-sounding, Amazon-optimized copy for a POD apparel listing "
+            "matching that analysis. "
+            f"Caption: {caption}"
+        )
+        parsed = self._ollama_json(prompt, cancel)
+        analysis = self._build_analysis(caption, self._section(parsed, "analysis"))
+        listing = self._build_listing(analysis, self._section(parsed, "listing"))
 
+        self._cache_put("analysis", analysis_key, analysis)
+        if self.cache is not None:
+            self._cache_put("listing", self._listing_key(analysis), listing)
+        return analysis, listing
+
+    @staticmethod
+    def _section(parsed: Dict, name: str) -> Dict:
+        section = parsed.get(name)
+        return section if isinstance(section, dict) else {}
+
+    def _build_analysis(self, caption: str, parsed: Dict) -> Dict:
         result = {
             "theme": parsed.get("theme", "general"),
             "objects": parsed.get("objects", self._caption_words(caption)),
@@ -65,20 +222,14 @@ class LocalAIService:
             "target_audience": parsed.get("target_audience", "general"),
             "caption": caption,
         }
-        if self._captioner_error:
+        if self.caption_worker.error:
             result["captioner_warning"] = "BLIP unavailable; using filename caption fallback"
         if not parsed:
             result["llm_warning"] = "Ollama unavailable; using deterministic fallback analysis"
         return result
 
-    def generate_listing(self, analysis: Dict) -> Dict:
-        prompt = (
-            "Return strict JSON only with keys: title(string), bullets(array of 5 strings), description(string), tags(array of <=10 short strings). "
-            "Generate natural, human-sounding, Amazon-optimized copy for a POD apparel listing. "
-            f"Input analysis: {json.dumps(analysis)}"
-        )
-        parsed = self._ollama_json(prompt)
-
+    @staticmethod
+    def _build_listing(analysis: Dict, parsed: Dict) -> Dict:
         bullets = parsed.get("bullets") or []
         while len(bullets) < 5:
             bullets.append("High-quality print-ready design with strong visual appeal.")
@@ -97,6 +248,11 @@ class LocalAIService:
             listing["llm_warning"] = "Ollama unavailable; using deterministic fallback listing"
         return listing
 
+    @staticmethod
+    def _degraded(result: Dict) -> bool:
+        """Fallback output from a failed Ollama call is never cached, so it is regenerated once Ollama is back."""
+        return "llm_warning" in result
+
     @staticmethod
     def _safe_json(text: str) -> Dict:
         text = text.strip()
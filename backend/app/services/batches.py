@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.app.models import Batch, Job, ProductRun
+from backend.app.services.job_queue import JobQueue
+from backend.app.services.monitor_service import is_image
+
+FINISHED = ("done", "failed", "aborted")
+
+
+def expand_paths(paths: List[str], directory: Optional[str] = None, pattern: str = "*", recursive: bool = False) -> List[str]:
+    """Explicit ``paths`` plus images under ``directory`` matching ``pattern``, de-duplicated in order."""
+    found = [str(Path(p)) for p in paths]
+    if directory:
+        root = Path(directory)
+        if not root.is_dir():
+            raise ValueError(f"Directory not found: {directory}")
+        matches = root.rglob(pattern) if recursive else root.glob(pattern)
+        found.extend(sorted(str(p) for p in matches if p.is_file() and is_image(str(p))))
+    return list(dict.fromkeys(found))
+
+
+class BatchService:
+    """Bulk imports: many images queued under one batch id and tracked through the job queue.
+
+    Batch items are ordinary intake jobs whose source is the batch, so batches take turns
+    with watched folders and each other, and go through the same pipeline concurrency.
+    """
+
+    def __init__(self, db_factory: Callable[[], Session], jobs: JobQueue, max_items: int = 10000):
+        self.db_factory = db_factory
+        self.jobs = jobs
+        self.max_items = max_items
+
+    def create(self, paths: List[str], profile: str = "", priority: int = 0, name: str = "") -> Dict:
+        accepted = [p for p in paths if is_image(p) and Path(p).is_file()]
+        accepted_set = set(accepted)
+        rejected = [p for p in paths if p not in accepted_set]
+        if not accepted:
+            raise ValueError("No existing image files in the request")
+        if len(accepted) > self.max_items:
+            raise ValueError(f"Batch has {len(accepted)} images; the limit is {self.max_items}")
+
+        db = self.db_factory()
+        try:
+            # The total is written with the items, so progress never sees an empty batch as done.
+            batch = Batch(name=name or None, profile=profile or None, total=0)
+            db.add(batch)
+            db.flush()
+            batch_id = batch.id
+            source = f"batch:{batch_id}"
+            already_queued = self.jobs.insert_many(db, accepted, source, profile, priority, batch_id)
+            total = len(accepted) - len(already_queued)
+            batch.total = total
+            db.commit()
+        finally:
+            db.close()
+        self.jobs.notify(source, priority)
+        return {
+            "batch_id": batch_id,
+            "total": total,
+            "already_queued": already_queued,
+            "rejected": rejected,
+        }
+
+    def progress(self, batch_id: int) -> Optional[Dict]:
+        db = self.db_factory()
+        try:
+            batch = db.query(Batch).filter(Batch.id == batch_id).first()
+            if batch is None:
+                return None
+            counts = dict.fromkeys(("pending", "leased", "running", "done", "failed", "aborted"), 0)
+            skipped = 0
+            rows = (
+                db.query(Job.status, Job.run_id.is_(None), func.count(Job.id))
+                .filter(Job.batch_id == batch_id)
+                .group_by(Job.status, Job.run_id.is_(None))
+            )
+            for status, no_run, count in rows:
+                counts[status] = counts.get(status, 0) + count
+                if status == "done" and no_run:
+                    skipped += count
+            drafts = (
+                db.query(func.count(Job.id))
+                .join(ProductRun, ProductRun.id == Job.run_id)
+                .filter(Job.batch_id == batch_id, ProductRun.printify_product_id.isnot(None))
+                .scalar()
+            )
+            finished = sum(counts[s] for s in FINISHED)
+            return {
+                "id": batch.id,
+                "name": batch.name,
+                "profile": batch.profile,
+                "state": "done" if finished >= batch.total else "running",
+                "total": batch.total,
+                "finished": finished,
+                "queued": counts["pending"] + counts["leased"],
+                "processing": counts["running"],
+                "drafts": drafts or 0,
+                "skipped": skipped,
+                "failed": counts["failed"],
+                "aborted": counts["aborted"],
+                "created_at": batch.created_at.isoformat() if batch.created_at else None,
+            }
+        finally:
+            db.close()
+
+    def items(
+        self,
+        batch_id: int,
+        after_id: int = 0,
+        limit: int = 500,
+        finished_only: bool = False,
+        changed_since: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """Items in job id order after ``after_id``, with the outcome of their run if one started."""
+        db = self.db_factory()
+        try:
+            query = (
+                db.query(
+                    Job.id,
+                    Job.path,
+                    Job.status,
+                    Job.attempts,
+                    Job.error,
+                    Job.run_id,
+                    ProductRun.status.label("run_status"),
+                    ProductRun.stage,
+                    ProductRun.printify_product_id,
+                    ProductRun.error_message,
+                )
+                .outerjoin(ProductRun, ProductRun.id == Job.run_id)
+                .filter(Job.batch_id == batch_id, Job.id > after_id)
+            )
+            if finished_only:
+                query = query.filter(Job.status.in_(FINISHED))
+            if changed_since is not None:
+                query = query.filter(Job.updated_at >= changed_since)
+            return [
+                {
+                    "job_id": row.id,
+                    "path": row.path,
+                    "status": row.status,
+                    "attempts": row.attempts,
+                    "run_id": row.run_id,
+                    "run_status": row.run_status,
+                    "stage": row.stage,
+                    "printify_product_id": row.printify_product_id,
+                    "error": row.error_message or row.error,
+                }
+                for row in query.order_by(Job.id).limit(limit)
+            ]
+        finally:
+            db.close()
+
+    def stream_items(
+        self, batch_id: int, follow: bool = False, poll_seconds: float = 1.0, idle_seconds: float = 300.0
+    ) -> Iterator[Dict]:
+        """Every item once. With ``follow``, items are yielded as they finish until the whole batch has.
+
+        Following also stops once the batch has made no progress for ``idle_seconds``, for example
+        while intake is stopped, so a client is never held open indefinitely.
+        """
+        if not follow:
+            yield from self._pages(batch_id)
+            return
+        emitted = set()
+        since = None
+        last_state = None
+        idle_since = time.monotonic()
+        while True:
+            polled_at = datetime.utcnow()
+            # Progress is read first so a "done" answer covers every item read below.
+            progress = self.progress(batch_id) or {}
+            done = progress.get("state", "done") == "done"
+            for item in self._pages(batch_id, finished_only=True, changed_since=since):
+                if item["job_id"] not in emitted:
+                    emitted.add(item["job_id"])
+                    yield item
+            if done:
+                return
+            state = tuple(progress.get(key) for key in ("finished", "processing", "queued"))
+            if state != last_state:
+                last_state, idle_since = state, time.monotonic()
+            elif time.monotonic() - idle_since >= idle_seconds:
+                return
+            # Overlap polls slightly so a row written just before a poll and committed after it is not missed.
+            since = polled_at - timedelta(seconds=1)
+            time.sleep(poll_seconds)
+
+    def _pages(self, batch_id: int, **filters) -> Iterator[Dict]:
+        after_id = 0
+        while True:
+            items = self.items(batch_id, after_id=after_id, **filters)
+            yield from items
+            if len(items) < 500:
+                return
+            after_id = items[-1]["job_id"]
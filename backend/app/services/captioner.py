@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import List, Optional, Tuple
+
+from backend.app.services.preprocess import load_downscaled
+
+BLIP_MODEL = "Salesforce/blip-image-captioning-base"
+# BLIP's processor resizes inputs to 384px, so larger images are only shrunk on the way in.
+BLIP_IMAGE_SIZE = 384
+
+
+class CaptionWorker:
+    """Owns the BLIP pipeline on a single background thread and captions images in micro-batches.
+
+    Callers get a ``Future`` per image. The worker waits up to ``max_wait_ms`` for more
+    requests after the first one arrives, then runs up to ``max_batch_size`` images
+    through the model in one call.
+    """
+
+    def __init__(self, model: str = BLIP_MODEL, max_batch_size: int = 8, max_wait_ms: int = 50, num_threads: int = 0):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.num_threads = num_threads
+        self.error: Optional[str] = None
+        self.batches = 0
+        self.images = 0
+        self._pending: queue.Queue[Tuple[str, Future]] = queue.Queue()
+        self._pipeline = None
+        self._inference_mode = nullcontext
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Load the model if needed and report whether captioning is possible."""
+        self._ensure_started()
+        self._ready.wait()
+        return self._pipeline is not None
+
+    def submit(self, image_path: str) -> Future:
+        future: Future = Future()
+        self._ensure_started()
+        self._pending.put((image_path, future))
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="caption-worker", daemon=True)
+                self._thread.start()
+
+    def _load(self):
+        try:
+            import torch  # type: ignore
+            from transformers import pipeline  # type: ignore
+
+            if self.num_threads > 0:
+                torch.set_num_threads(self.num_threads)
+            self._inference_mode = torch.inference_mode
+            self._pipeline = pipeline("image-to-text", model=self.model)
+        except Exception as exc:
+            self.error = str(exc)
+            self._pipeline = None
+        finally:
+            self._ready.set()
+
+    def _next_batch(self) -> List[Tuple[str, Future]]:
+        batch = [self._pending.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._pending.get(timeout=remaining) if remaining > 0 else self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        self._load()
+        while True:
+            batch = [item for item in self._next_batch() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            if self._pipeline is None:
+                for _, future in batch:
+                    future.set_exception(RuntimeError(self.error or "Captioning model unavailable"))
+                continue
+            self._caption_batch(batch)
+
+    def _caption_batch(self, batch: List[Tuple[str, Future]]):
+        images, futures = [], []
+        for image_path, future in batch:
+            try:
+                images.append(load_downscaled(image_path, BLIP_IMAGE_SIZE).convert("RGB"))
+                futures.append(future)
+            except Exception as exc:
+                future.set_exception(exc)
+        if not images:
+            return
+
+        try:
+            with self._inference_mode():
+                results = self._pipeline(images, batch_size=len(images))
+        except Exception as exc:
+            for future in futures:
+                future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.images += len(images)
+        for future, result in zip(futures, results):
+            # Batched calls return one list of candidates per input image.
+            candidates = result if isinstance(result, list) else [result]
+            future.set_result(candidates[0].get("generated_text", "") if candidates else "")
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model,
+            "loaded": self._pipeline is not None,
+            "error": self.error,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": int(self.max_wait * 1000),
+            "pending": self._pending.qsize(),
+            "batches": self.batches,
+            "images": self.images,
+        }
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.app.models import CatalogCacheEntry
+
+CacheKey = Tuple[str, int, int]
+
+
+@dataclass
+class CatalogEntry:
+    data: Dict
+    etag: Optional[str]
+    fetched_at: datetime
+
+
+class CatalogCache:
+    """LRU cache of Printify catalog responses keyed by ``(kind, blueprint_id, provider_id)``.
+
+    Entries live in memory for fast lookups and in the ``catalog_cache`` table so they
+    survive restarts. Expired entries are kept so their ETag can be used to revalidate.
+    """
+
+    def __init__(self, db_factory: Callable[[], Session], ttl_seconds: int = 3600, max_entries: int = 256):
+        self.db_factory = db_factory
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._entries: OrderedDict[CacheKey, CatalogEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_fresh(self, entry: CatalogEntry) -> bool:
+        return datetime.utcnow() - entry.fetched_at < self.ttl
+
+    def peek(self, kind: str, blueprint_id: int, provider_id: int) -> Optional[CatalogEntry]:
+        """Memory-only lookup; never touches the database."""
+        key = (kind, blueprint_id, provider_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def get(self, kind: str, blueprint_id: int, provider_id: int) -> Optional[CatalogEntry]:
+        entry = self.peek(kind, blueprint_id, provider_id)
+        if entry is not None:
+            return entry
+
+        db = self.db_factory()
+        try:
+            row = self._row_query(db, kind, blueprint_id, provider_id).first()
+            if row is None:
+                return None
+            entry = CatalogEntry(data=json.loads(row.payload), etag=row.etag, fetched_at=row.fetched_at)
+        finally:
+            db.close()
+
+        self._remember((kind, blueprint_id, provider_id), entry)
+        return entry
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, kind: str, blueprint_id: int, provider_id: int, data: Dict, etag: Optional[str]) -> CatalogEntry:
+        entry = CatalogEntry(data=data, etag=etag, fetched_at=datetime.utcnow())
+        self._remember((kind, blueprint_id, provider_id), entry)
+        self._store(kind, blueprint_id, provider_id, entry)
+        return entry
+
+    def touch(self, kind: str, blueprint_id: int, provider_id: int, entry: CatalogEntry) -> CatalogEntry:
+        """Mark a stale entry fresh again after the server answered 304 Not Modified."""
+        refreshed = CatalogEntry(data=entry.data, etag=entry.etag, fetched_at=datetime.utcnow())
+        with self._lock:
+            self.revalidated += 1
+        self._remember((kind, blueprint_id, provider_id), refreshed)
+        db = self.db_factory()
+        try:
+            self._row_query(db, kind, blueprint_id, provider_id).update(
+                {CatalogCacheEntry.fetched_at: refreshed.fetched_at}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+        return refreshed
+
+    def invalidate(self, blueprint_id: Optional[int] = None, provider_id: Optional[int] = None) -> int:
+        def matches(bp: int, pv: int) -> bool:
+            return (blueprint_id is None or bp == blueprint_id) and (provider_id is None or pv == provider_id)
+
+        with self._lock:
+            for key in [k for k in self._entries if matches(k[1], k[2])]:
+                del self._entries[key]
+
+        db = self.db_factory()
+        try:
+            query = db.query(CatalogCacheEntry)
+            if blueprint_id is not None:
+                query = query.filter(CatalogCacheEntry.blueprint_id == blueprint_id)
+            if provider_id is not None:
+                query = query.filter(CatalogCacheEntry.provider_id == provider_id)
+            removed = query.delete(synchronize_session=False)
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": int(self.ttl.total_seconds()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+            }
+
+    @staticmethod
+    def _row_query(db: Session, kind: str, blueprint_id: int, provider_id: int):
+        return db.query(CatalogCacheEntry).filter(
+            CatalogCacheEntry.kind == kind,
+            CatalogCacheEntry.blueprint_id == blueprint_id,
+            CatalogCacheEntry.provider_id == provider_id,
+        )
+
+    def _remember(self, key: CacheKey, entry: CatalogEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _store(self, kind: str, blueprint_id: int, provider_id: int, entry: CatalogEntry):
+        db = self.db_factory()
+        try:
+            values = {"payload": json.dumps(entry.data), "etag": entry.etag, "fetched_at": entry.fetched_at}
+            if not self._row_query(db, kind, blueprint_id, provider_id).update(values, synchronize_session=False):
+                db.add(CatalogCacheEntry(kind=kind, blueprint_id=blueprint_id, provider_id=provider_id, **values))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker inserted the same key first; overwrite its row instead.
+                db.rollback()
+                self._row_query(db, kind, blueprint_id, provider_id).update(values, synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
@@ -1,18 +1,100 @@
+import copy
 import json
-from typing import Any
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 from sqlalchemy.orm import Session
 
 from backend.app.models import AppConfig
+from backend.app.schemas import SettingsPayload
+from backend.app.services.pricing import PricingEngine
+
+MISSING = object()
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """Validated settings for one profile as of one config version. Shared between readers: do not mutate."""
+
+    version: int
+    profile: str
+    payload: SettingsPayload
+    data: Dict[str, Any]
+    pricing: PricingEngine
+
+
+class ConfigCache:
+    """Process-wide cache of decoded ``AppConfig`` values and validated settings snapshots.
+
+    Every ``ConfigStore.set`` bumps the version and drops what it cached, and values loaded
+    while a write was in flight are not kept, so readers never see a stale entry.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._values: Dict[str, Any] = {}
+        self._snapshots: Dict[str, SettingsSnapshot] = {}
+        self._lock = threading.Lock()
+
+    def value(self, key: str, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            cached = self._values.get(key, MISSING)
+            version = self.version
+        if cached is not MISSING:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        loaded = load()
+        with self._lock:
+            if self.version == version:
+                self._values[key] = loaded
+        return loaded
+
+    def snapshot(self, profile: str, build: Callable[[], SettingsSnapshot]) -> SettingsSnapshot:
+        with self._lock:
+            cached = self._snapshots.get(profile)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        snapshot = build()
+        with self._lock:
+            if self.version == snapshot.version:
+                self._snapshots[profile] = snapshot
+        return snapshot
+
+    def invalidate(self, key: Optional[str] = None):
+        with self._lock:
+            self.version += 1
+            if key is None:
+                self._values.clear()
+            else:
+                self._values.pop(key, None)
+            self._snapshots.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"version": self.version, "hits": self.hits, "misses": self.misses, "snapshots": len(self._snapshots)}
+
+
+config_cache = ConfigCache()
 
 
 class ConfigStore:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache: ConfigCache = config_cache):
         self.db = db
+        self.cache = cache
 
     def get(self, key: str, default: Any = None):
+        value = self.cache.value(key, lambda: self._load(key))
+        # Callers are free to edit what they get back, so they get their own copy.
+        return default if value is MISSING else copy.deepcopy(value)
+
+    def _load(self, key: str) -> Any:
         item = self.db.query(AppConfig).filter(AppConfig.key == key).first()
         if not item:
-            return default
+            return MISSING
         return json.loads(item.value)
 
     def set(self, key: str, value: Any):
@@ -24,3 +106,31 @@ class ConfigStore:
         else:
             item.value = payload
         self.db.commit()
+        self.cache.invalidate(key)
+
+    def watch_folders(self) -> List[Dict]:
+        """Configured watch roots, including the legacy single ``watch_folder`` setting."""
+        folders = list(self.get("watch_folders", []))
+        legacy = self.get("settings", {}).get("watch_folder")
+        if legacy and all(Path(f["path"]) != Path(legacy) for f in folders):
+            folders.insert(0, {"path": legacy, "recursive": False, "profile": ""})
+        return folders
+
+    def snapshot(self, profile: Optional[str] = None) -> SettingsSnapshot:
+        """Global settings with the named profile's overrides applied, validated once per config version."""
+        return self.cache.snapshot(profile or "", lambda: self._build_snapshot(profile or ""))
+
+    def _build_snapshot(self, profile: str) -> SettingsSnapshot:
+        version = self.cache.version
+        config = self.get("settings", {})
+        if profile:
+            profiles = self.get("profiles", {})
+            if profile not in profiles:
+                raise LookupError(f"Unknown settings profile: {profile}")
+            config = {**config, **profiles[profile]}
+        payload = SettingsPayload(**config)
+        data = payload.model_dump()
+        return SettingsSnapshot(version, profile, payload, data, PricingEngine(data))
+
+    def profile_settings(self, profile: Optional[str] = None) -> Dict:
+        return self.snapshot(profile).data
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+class Subscription:
+    """One connected event-stream client; lives on the event loop that serves it."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_pending: int):
+        self.loop = loop
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_pending)
+
+    def offer(self, message: str):
+        """Runs on the subscriber's loop. A client that falls behind is told to reload instead."""
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+
+class EventBus:
+    """Fans server events out to Server-Sent Events subscribers.
+
+    ``publish`` may be called from any thread. Each event is encoded once however many
+    clients are connected, and does nothing at all when nobody is listening.
+    """
+
+    def __init__(self, max_pending: int = 500):
+        self.max_pending = max_pending
+        self.published = 0
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop(), self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, kind: str, data: Any, event_id: Optional[int] = None):
+        if not self._subscribers:
+            return
+        header = f"id: {event_id}\n" if event_id is not None else ""
+        message = f"{header}event: {kind}\ndata: {json.dumps(data, default=str)}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # The client's event loop has shut down.
+                self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "published": self.published}
+
+
+class SnapshotFeed:
+    """Polls snapshot ``sources`` and publishes each one whenever its value changes.
+
+    The thread only runs while someone is subscribed, and one poll serves every client.
+    """
+
+    def __init__(self, bus: EventBus, sources: Dict[str, Callable[[], Any]], interval_ms: int = 1000):
+        self.bus = bus
+        self.sources = sources
+        self.interval = max(100, interval_ms) / 1000
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def ensure_running(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-feed", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        last: Dict[str, Any] = {}
+        while True:
+            with self._lock:
+                if not self.bus.has_subscribers:
+                    self._thread = None
+                    return
+            for kind, source in self.sources.items():
+                try:
+                    value = source()
+                except Exception as exc:
+                    logger.warning("%s snapshot failed: %s", kind, exc)
+                    continue
+                if value != last.get(kind):
+                    last[kind] = value
+                    self.bus.publish(kind, value)
+            time.sleep(self.interval)
+
+
+event_bus = EventBus(max_pending=settings.event_queue_size)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Optional
+
+from backend.app.core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+ALGORITHMS = ("sha256", "blake2b", "xxh3")
+
+
+def _hasher(algorithm: str):
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=32)
+    if algorithm == "xxh3":
+        try:
+            import xxhash  # type: ignore
+        except ImportError as exc:
+            raise RuntimeError("HASH_ALGORITHM=xxh3 requires the xxhash package") from exc
+        return xxhash.xxh3_128()
+    raise ValueError(f"Unsupported hash algorithm {algorithm!r}; expected one of {', '.join(ALGORITHMS)}")
+
+
+def file_digest(path: str, algorithm: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> str:
+    """Hash a file in fixed-size chunks read into one reused buffer.
+
+    SHA-256 digests are bare hex, matching rows written before other algorithms existed;
+    other algorithms are prefixed (``blake2b:…``) so digests never collide across algorithms.
+    """
+    algorithm = algorithm or settings.hash_algorithm
+    h = _hasher(algorithm)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while read := f.readinto(buffer):
+            h.update(view[:read])
+    digest = h.hexdigest()
+    return digest if algorithm == "sha256" else f"{algorithm}:{digest}"
+
+
+def stat_signature(stat: os.stat_result) -> dict:
+    """Size, mtime and inode recorded on ``ProcessedImage`` to skip re-hashing unchanged files."""
+    return {"file_size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "inode": stat.st_ino}
+
+
+def entry_signature(entry: os.DirEntry) -> dict:
+    """``stat_signature`` for a ``scandir`` entry, matching what ``os.stat`` gives for the same file.
+
+    On Windows ``DirEntry.stat()`` reports ``st_ino`` as 0, so the real file index is taken from
+    ``entry.inode()`` there (one extra system call); elsewhere the cached stat is used as is.
+    """
+    stat = entry.stat()
+    signature = stat_signature(stat)
+    if not stat.st_ino:
+        signature["inode"] = entry.inode()
+    return signature
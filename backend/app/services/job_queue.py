@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from backend.app.models import Job, ProductRun
+
+SOURCE_REFRESH_SECONDS = 1.0
+
+# Claim statements are built once; they run on every claim and ORM query construction dominated their cost.
+NEXT_PENDING = (
+    select(Job.id, Job.path, Job.source, Job.profile, Job.attempts)
+    .where(Job.status == "pending", Job.source == bindparam("source"))
+    .order_by(Job.priority.desc(), Job.id)
+    .limit(1)
+)
+TAKE_LEASE = (
+    update(Job)
+    .where(Job.id == bindparam("job_id"), Job.status == "pending")
+    .values(
+        status="leased",
+        leased_by=bindparam("worker"),
+        lease_expires_at=bindparam("expires"),
+        attempts=Job.attempts + 1,
+    )
+)
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    path: str
+    source: str
+    profile: str
+    attempts: int
+
+
+class JobQueue:
+    """Durable intake queue stored in the ``jobs`` table.
+
+    Workers claim a job by taking a lease with a conditional UPDATE and checking that it
+    changed a row, so two workers can never hold the same job. A job whose lease runs out
+    (its worker crashed or hung) goes back to ``pending``. Once a job has produced a
+    ``ProductRun`` it is ``running`` until the pipeline finishes it.
+
+    Sources with ready jobs are served in turn, highest priority first.
+    """
+
+    def __init__(self, db_factory: Callable[[], Session], lease_seconds: int = 300, max_attempts: int = 3):
+        self.db_factory = db_factory
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max(1, max_attempts)
+        self._served: Dict[str, int] = {}
+        self._turn = 0
+        self._sources: Dict[str, int] = {}
+        self._sources_at = 0.0
+        self._swept_at = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+
+    def enqueue(self, path: str, source: str, profile: str = "", priority: int = 0) -> int:
+        """Add a job for ``path``, or return the id of the one already waiting for it."""
+        db = self.db_factory()
+        try:
+            existing = db.query(Job.id).filter(Job.path == path, Job.status.in_(("pending", "leased"))).first()
+            if existing:
+                return existing.id
+            job = Job(path=path, source=source, profile=profile or None, priority=priority)
+            db.add(job)
+            db.commit()
+            job_id = job.id
+        finally:
+            db.close()
+
+        with self._lock:
+            self._sources[source] = max(priority, self._sources.get(source, priority))
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def enqueue_many(
+        self, paths: List[str], source: str, profile: str = "", priority: int = 0, batch_id: Optional[int] = None
+    ) -> List[str]:
+        """Add jobs for ``paths`` in one transaction; returns the paths skipped as already waiting."""
+        db = self.db_factory()
+        try:
+            waiting = self.insert_many(db, paths, source, profile, priority, batch_id)
+            db.commit()
+        finally:
+            db.close()
+        self.notify(source, priority)
+        return waiting
+
+    def insert_many(
+        self,
+        db: Session,
+        paths: List[str],
+        source: str,
+        profile: str = "",
+        priority: int = 0,
+        batch_id: Optional[int] = None,
+    ) -> List[str]:
+        """``enqueue_many`` inside the caller's transaction; call ``notify`` once it commits."""
+        waiting = set()
+        for start in range(0, len(paths), 500):
+            chunk = paths[start : start + 500]
+            rows = db.query(Job.path).filter(Job.path.in_(chunk), Job.status.in_(("pending", "leased")))
+            waiting.update(path for path, in rows)
+        now = datetime.utcnow()
+        db.bulk_insert_mappings(
+            Job,
+            [
+                {
+                    "path": path,
+                    "source": source,
+                    "profile": profile or None,
+                    "status": "pending",
+                    "stage": "intake",
+                    "priority": priority,
+                    "attempts": 0,
+                    "batch_id": batch_id,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for path in paths
+                if path not in waiting
+            ],
+        )
+        return [path for path in paths if path in waiting]
+
+    def notify(self, source: str, priority: int = 0):
+        """Wake idle workers for jobs committed under ``source``."""
+        with self._lock:
+            self._sources[source] = max(priority, self._sources.get(source, priority))
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def wait(self, timeout: float):
+        """Sleep until a job is enqueued or ``timeout`` passes."""
+        with self._wakeup:
+            self._wakeup.wait(timeout)
+
+    def claim(self, worker: str) -> Optional[ClaimedJob]:
+        self._requeue_expired()
+        db = self.db_factory()
+        try:
+            # A lost race means another worker leased the candidate first; pick again.
+            for _ in range(5):
+                source = self._next_source(db)
+                if source is None:
+                    return None
+                conn = db.connection()
+                row = conn.execute(NEXT_PENDING, {"source": source}).first()
+                if row is None:
+                    with self._lock:
+                        self._sources.pop(source, None)
+                    continue
+                expires = datetime.utcnow() + self.lease
+                claimed = conn.execute(TAKE_LEASE, {"job_id": row.id, "worker": worker, "expires": expires}).rowcount
+                db.commit()
+                if claimed:
+                    with self._lock:
+                        self._turn += 1
+                        self._served[source] = self._turn
+                    return ClaimedJob(row.id, row.path, row.source, row.profile or "", row.attempts + 1)
+            return None
+        finally:
+            db.close()
+
+    def _next_source(self, db: Session) -> Optional[str]:
+        """Pick the least recently served source among those holding the highest-priority work.
+
+        The per-source summary is cached briefly so a claim costs two indexed statements.
+        """
+        with self._lock:
+            stale = time.monotonic() - self._sources_at > SOURCE_REFRESH_SECONDS or not self._sources
+        if stale:
+            rows = db.query(Job.source, func.max(Job.priority)).filter(Job.status == "pending").group_by(Job.source).all()
+            with self._lock:
+                self._sources = {source: priority for source, priority in rows}
+                self._sources_at = time.monotonic()
+        with self._lock:
+            if not self._sources:
+                return None
+            top = max(self._sources.values())
+            candidates = [s for s, p in self._sources.items() if p == top]
+            return min(candidates, key=lambda s: self._served.get(s, 0))
+
+    def _requeue_expired(self):
+        """Return jobs whose lease ran out to ``pending``; runs at most once per sweep interval."""
+        with self._lock:
+            if time.monotonic() - self._swept_at < SOURCE_REFRESH_SECONDS:
+                return
+            self._swept_at = time.monotonic()
+        db = self.db_factory()
+        try:
+            expired = (
+                db.query(Job)
+                .filter(Job.status == "leased", Job.lease_expires_at < datetime.utcnow())
+                .update({Job.status: "pending", Job.leased_by: None, Job.lease_expires_at: None}, synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+        if expired:
+            with self._lock:
+                self._sources_at = 0.0
+
+    def mark_running(self, job_id: int, run_id: int, stage: str = "prepare"):
+        self._update(job_id, status="running", run_id=run_id, stage=stage, lease_expires_at=None)
+
+    def complete(self, job_id: int):
+        self._update(job_id, status="done", lease_expires_at=None)
+
+    def fail(self, job_id: int, error: str):
+        """Return the job to the queue, or give up once it has used all its attempts."""
+        db = self.db_factory()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job is None:
+                return
+            job.status = "failed" if job.attempts >= self.max_attempts else "pending"
+            job.error = error
+            job.lease_expires_at = None
+            db.commit()
+        finally:
+            db.close()
+
+    def finish_run(self, db: Session, run: ProductRun):
+        """Close the job that produced ``run`` using the caller's session."""
+        status = {"done": "done", "aborted": "aborted"}.get(run.status, "failed")
+        db.query(Job).filter(Job.run_id == run.id).update(
+            {Job.status: status, Job.stage: run.stage, Job.error: run.error_message},
+            synchronize_session=False,
+        )
+        db.commit()
+
+    def recover(self) -> List[int]:
+        """Release leases left by a previous process and return runs that were mid-pipeline."""
+        db = self.db_factory()
+        try:
+            db.query(Job).filter(Job.status == "leased").update(
+                {Job.status: "pending", Job.leased_by: None, Job.lease_expires_at: None}, synchronize_session=False
+            )
+            resumable = []
+            for job in db.query(Job).filter(Job.status == "running").all():
+                run = db.query(ProductRun).filter(ProductRun.id == job.run_id).first()
+                if run is None:
+                    job.status, job.error = "failed", f"Run {job.run_id} no longer exists"
+                elif run.printify_product_id or run.status == "done":
+                    job.status = "done"
+                elif run.status in ("error", "aborted"):
+                    job.status, job.error = ("aborted" if run.status == "aborted" else "failed"), run.error_message
+                else:
+                    resumable.append(run.id)
+            db.commit()
+            return resumable
+        finally:
+            db.close()
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        db = self.db_factory()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job is None:
+                return None
+            return {
+                "id": job.id,
+                "path": job.path,
+                "source": job.source,
+                "profile": job.profile,
+                "status": job.status,
+                "stage": job.stage,
+                "priority": job.priority,
+                "attempts": job.attempts,
+                "run_id": job.run_id,
+                "error": job.error,
+                "lease_expires_at": job.lease_expires_at.isoformat() if job.lease_expires_at else None,
+                "created_at": job.created_at.isoformat() if job.created_at else None,
+            }
+        finally:
+            db.close()
+
+    def depths(self) -> Dict[str, int]:
+        """Jobs waiting to be claimed, per source."""
+        db = self.db_factory()
+        try:
+            rows = db.query(Job.source, func.count(Job.id)).filter(Job.status == "pending").group_by(Job.source)
+            return {source: count for source, count in rows}
+        finally:
+            db.close()
+
+    def _update(self, job_id: int, **values):
+        db = self.db_factory()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
@@ -1,15 +1,150 @@
+from __future__ import annotations
+
 import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
 from sqlalchemy.orm import Session
 
+from backend.app.core.config import settings
+from backend.app.core.database import SessionLocal
 from backend.app.models import ProcessingLog
+from backend.app.services.events import EventBus, event_bus
+from backend.app.services.stats import bump_many
+
+logger = logging.getLogger(__name__)
+
+
+class LogWriter:
+    """Inserts ``ProcessingLog`` rows from one background thread in grouped transactions.
+
+    Callers only enqueue a row, so logging never waits on the database. The writer takes
+    whatever has queued up within ``flush_interval_ms`` (at most ``batch_size`` rows) and
+    commits it, together with the log counters, as one transaction. Committed rows are
+    pushed to event-stream clients as one ``logs`` event per batch.
+    """
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Session],
+        batch_size: int = 200,
+        flush_interval_ms: int = 250,
+        events: Optional[EventBus] = None,
+    ):
+        self.db_factory = db_factory
+        self.events = events
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._pending: queue.Queue[Union[Dict, threading.Event]] = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def write(self, image_path: Optional[str], level: str, message: str, details: Optional[dict] = None):
+        self._ensure_started()
+        self._pending.put(
+            {
+                "image_path": image_path,
+                "level": level,
+                "message": message,
+                "details": json.dumps(details) if details else None,
+                "created_at": datetime.utcnow(),
+            }
+        )
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything written so far is committed."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._pending.put(done)
+        return done.wait(timeout)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": self._pending.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+        }
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> List[Union[Dict, threading.Event]]:
+        batch = [self._pending.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not isinstance(batch[-1], threading.Event):
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._pending.get(timeout=remaining) if remaining > 0 else self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            rows = [item for item in batch if isinstance(item, dict)]
+            if rows:
+                self._insert(rows)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _insert(self, rows: List[Dict]):
+        listening = self.events is not None and self.events.has_subscribers
+        db = self.db_factory()
+        try:
+            # Row ids are only fetched back when a client will be sent them.
+            db.bulk_insert_mappings(ProcessingLog, rows, return_defaults=listening)
+            bump_many(
+                db,
+                [("logs", row["created_at"], 1) for row in rows]
+                + [("logs_error", row["created_at"], 1) for row in rows if row["level"] == "ERROR"],
+            )
+            db.commit()
+            self.written += len(rows)
+            self.batches += 1
+            if listening:
+                self.events.publish(
+                    "logs",
+                    [
+                        {
+                            "id": row.get("id"),
+                            "level": row["level"],
+                            "message": row["message"],
+                            "image_path": row["image_path"],
+                            "created_at": row["created_at"].isoformat(),
+                        }
+                        for row in rows
+                    ],
+                )
+        except Exception as exc:
+            db.rollback()
+            self.dropped += len(rows)
+            logger.error("Dropped %d log rows: %s", len(rows), exc)
+        finally:
+            db.close()
+
+
+log_writer = LogWriter(
+    SessionLocal,
+    batch_size=settings.log_batch_size,
+    flush_interval_ms=settings.log_flush_interval_ms,
+    events=event_bus,
+)
 
 
-def log_event(db: Session, message: str, level: str = "INFO", image_path: str | None = None, details: dict | None = None):
-    log = ProcessingLog(
-        image_path=image_path,
-        level=level,
-        message=message,
-        details=json.dumps(details) if details else None,
-    )
-    db.add(log)
-    db.commit()
+def log_event(message: str, level: str = "INFO", image_path: str | None = None, details: dict | None = None):
+    """Queue a log row for the background writer."""
+    log_writer.write(image_path, level, message, details)
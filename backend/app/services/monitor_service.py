@@ -1,158 +1,633 @@
 from __future__ import annotations
 
-import hashlib
-import queue
+import os
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from sqlalchemy.orm import Session
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 
 from backend.app.models import ProcessedImage, ProductRun
+from backend.app.services.hashing import entry_signature, file_digest, stat_signature
+from backend.app.services.job_queue import JobQueue
 from backend.app.services.logger import log_event
+from backend.app.services.pipeline import PipelineEngine, PipelineJob
+from backend.app.services.similarity import DUPLICATE_ACTIONS, HASH_BITS, PerceptualIndex, dhash, from_hex, to_hex
+from backend.app.services.stats import bump
 
 ALLOWED_SUFFIXES = {".png", ".jpg", ".jpeg"}
+# Stable checks a zero-byte file gets before it is handed on anyway.
+EMPTY_FILE_CHECKS = 5
+
+
+def is_image(path: str) -> bool:
+    return Path(path).suffix.lower() in ALLOWED_SUFFIXES
+
+
+class FileSettler:
+    """Holds newly seen files until writes to them have finished, then hands them to ``dispatch``.
+
+    A close-after-write event settles a file at once. Otherwise size and mtime are polled,
+    doubling the delay between checks, until two consecutive checks agree.
+    """
+
+    def __init__(self, dispatch: Callable[[str], None], min_delay_ms: int = 50, max_delay_ms: int = 2000):
+        self.dispatch = dispatch
+        self.min_delay = max(1, min_delay_ms) / 1000
+        self.max_delay = max(min_delay_ms, max_delay_ms) / 1000
+        self.running = False
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+        self._thread = threading.Thread(target=self._run, name="file-settler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._pending.clear()
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def watch(self, path: str):
+        """Start (or restart) waiting for ``path`` to stop changing."""
+        with self._cond:
+            entry = self._pending.setdefault(path, {"signature": None})
+            entry["delay"] = self.min_delay
+            entry["due"] = time.monotonic() + self.min_delay
+            self._cond.notify_all()
+
+    def touch(self, path: str):
+        """A write was seen; lengthen the quiet period required before the file counts as settled."""
+        with self._cond:
+            entry = self._pending.get(path)
+            if entry is None:
+                return
+            entry["delay"] = min(entry["delay"] * 2, self.max_delay)
+            entry["due"] = time.monotonic() + entry["delay"]
+            self._cond.notify_all()
+
+    def settle(self, path: str):
+        """The writer closed the file; dispatch it now if it was waiting."""
+        with self._cond:
+            if self._pending.pop(path, None) is None:
+                return
+        self.dispatch(path)
+
+    def forget(self, path: str):
+        with self._cond:
+            self._pending.pop(path, None)
+
+    def _run(self):
+        while self.running:
+            for path in self._wait_for_due():
+                self._check(path)
+
+    def _wait_for_due(self) -> List[str]:
+        with self._cond:
+            while self.running:
+                now = time.monotonic()
+                due = [path for path, entry in self._pending.items() if entry["due"] <= now]
+                if due:
+                    return due
+                next_due = min((entry["due"] for entry in self._pending.values()), default=now + 1)
+                self._cond.wait(timeout=next_due - now)
+            return []
+
+    def _check(self, path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.forget(path)
+            return
+
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._cond:
+            entry = self._pending.get(path)
+            if entry is None:
+                return
+            stable = entry["signature"] == signature
+            if stable and stat.st_size == 0:
+                # Writers often create the file before filling it; one that stays empty is passed on
+                # after a few checks so it fails visibly instead of waiting here forever.
+                entry["empty_checks"] = entry.get("empty_checks", 0) + 1
+            ready = stable and (stat.st_size > 0 or entry["empty_checks"] >= EMPTY_FILE_CHECKS)
+            if ready:
+                del self._pending[path]
+            else:
+                entry["signature"] = signature
+                entry["delay"] = min(entry["delay"] * 2, self.max_delay)
+                entry["due"] = time.monotonic() + entry["delay"]
+        if ready:
+            self.dispatch(path)
 
 
 class NewImageHandler(FileSystemEventHandler):
-    def __init__(self, work_queue: queue.Queue[str]):
-        self.work_queue = work_queue
+    def __init__(self, settler: FileSettler):
+        self.settler = settler
 
     def on_created(self, event):
+        if not event.is_directory and is_image(event.src_path):
+            self.settler.watch(str(Path(event.src_path)))
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.settler.touch(str(Path(event.src_path)))
+
+    def on_closed(self, event):
+        if not event.is_directory:
+            self.settler.settle(str(Path(event.src_path)))
+
+    def on_moved(self, event):
         if event.is_directory:
             return
-        path = Path(event.src_path)
-        if path.suffix.lower() in ALLOWED_SUFFIXES:
-            self.work_queue.put(str(path))
+        self.settler.forget(str(Path(event.src_path)))
+        # Writers often save to a temp name and rename when done, so the destination is complete.
+        if is_image(event.dest_path):
+            self.settler.dispatch(str(Path(event.dest_path)))
 
 
-class MonitorManager:
-    def __init__(self, db_factory: Callable[[], Session], processor: Callable[[str], dict]):
+class BaselineScan:
+    """Records files already in a watched folder as ``baseline`` without processing them.
+
+    Runs on its own thread: one query loads every known row under the folder, only new or
+    changed files are hashed (in a thread pool), and rows are written in batched transactions.
+    Files modified after ``cutoff`` arrived once monitoring began and are left to the watcher.
+    """
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Session],
+        folder: str,
+        cutoff: float,
+        recursive: bool = False,
+        hash_workers: int = 4,
+        batch_size: int = 500,
+    ):
         self.db_factory = db_factory
-        self.processor = processor
-        self.observer: Optional[Observer] = None
-        self.work_queue: queue.Queue[str] = queue.Queue()
-        self.running = False
-        self.current_file: Optional[str] = None
-        self.worker_thread: Optional[threading.Thread] = None
+        self.folder = folder
+        self.recursive = recursive
+        self.cutoff_ns = int(cutoff * 1_000_000_000)
+        self.hash_workers = max(1, hash_workers)
+        self.batch_size = max(1, batch_size)
+        self.progress: Dict[str, Any] = {
+            "state": "pending",
+            "folder": folder,
+            "scanned": 0,
+            "hashed": 0,
+            "inserted": 0,
+            "updated": 0,
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        self.thread: Optional[threading.Thread] = None
 
-    def start(self, folder: str):
-        if self.running:
-            return
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="baseline-scan", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        self.progress.update(state="running", started_at=datetime.utcnow().isoformat())
+        try:
+            known = self._known_rows()
+            changed = []
+            for entry in self._entries():
+                self.progress["scanned"] += 1
+                signature = entry_signature(entry)
+                if signature["mtime_ns"] >= self.cutoff_ns:
+                    continue
+                row = known.get(entry.path)
+                if row is not None and all(row[k] == v for k, v in signature.items()):
+                    continue
+                changed.append((entry.path, signature, row))
+
+            pending: List[tuple] = []
+            with ThreadPoolExecutor(max_workers=self.hash_workers, thread_name_prefix="baseline-hash") as pool:
+                futures = {pool.submit(file_digest, path): (path, signature, row) for path, signature, row in changed}
+                for future in as_completed(futures):
+                    path, signature, row = futures[future]
+                    try:
+                        file_hash = future.result()
+                    except OSError:
+                        continue
+                    self.progress["hashed"] += 1
+                    pending.append((path, signature, row, file_hash))
+                    if len(pending) >= self.batch_size:
+                        self._flush(pending)
+                        pending = []
+            self._flush(pending)
+            self.progress.update(state="done", finished_at=datetime.utcnow().isoformat())
+            self._log(
+                f"Baseline scan finished: {self.progress['scanned']} files, "
+                f"{self.progress['hashed']} hashed, {self.progress['inserted']} new"
+            )
+        except Exception as exc:
+            self.progress.update(state="error", error=str(exc), finished_at=datetime.utcnow().isoformat())
+            self._log(f"Baseline scan failed: {exc}", "ERROR")
+
+    def _log(self, message: str, level: str = "INFO"):
+        log_event(message, level)
 
-        folder_path = Path(folder)
-        folder_path.mkdir(parents=True, exist_ok=True)
+    def _entries(self):
+        pending = [self.folder]
+        while pending:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    if entry.is_file() and is_image(entry.name):
+                        yield entry
+                    elif self.recursive and entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
 
+    def _known_rows(self) -> Dict[str, Dict[str, Any]]:
+        prefix = os.path.join(self.folder, "")
         db = self.db_factory()
         try:
-            for p in folder_path.iterdir():
-                if p.is_file() and p.suffix.lower() in ALLOWED_SUFFIXES:
-                    self._mark_baseline(db, str(p))
-            log_event(db, f"Monitoring started for {folder}")
+            rows = (
+                db.query(
+                    ProcessedImage.path,
+                    ProcessedImage.file_hash,
+                    ProcessedImage.file_size,
+                    ProcessedImage.mtime_ns,
+                    ProcessedImage.inode,
+                )
+                .filter(ProcessedImage.path.startswith(prefix, autoescape=True))
+                .all()
+            )
+            return {
+                r.path: {"file_hash": r.file_hash, "file_size": r.file_size, "mtime_ns": r.mtime_ns, "inode": r.inode}
+                for r in rows
+            }
+        finally:
+            db.close()
+
+    def _flush(self, pending: List[tuple]):
+        if not pending:
+            return
+        inserts, updates = [], []
+        for path, signature, row, file_hash in pending:
+            if row is None:
+                inserts.append(
+                    {
+                        "path": path,
+                        "file_hash": file_hash,
+                        "status": "baseline",
+                        "message": "Existing before monitoring started",
+                        **signature,
+                    }
+                )
+            else:
+                values = dict(signature)
+                if row["file_hash"] != file_hash:
+                    values.update(file_hash=file_hash, status="baseline", message="Changed before monitoring started")
+                updates.append((path, values))
+
+        db = self.db_factory()
+        try:
+            if inserts:
+                db.bulk_insert_mappings(ProcessedImage, inserts)
+            for path, values in updates:
+                db.query(ProcessedImage).filter(ProcessedImage.path == path).update(values, synchronize_session=False)
+            db.commit()
         finally:
             db.close()
+        self.progress["inserted"] += len(inserts)
+        self.progress["updated"] += len(updates)
+
 
+class MonitorManager:
+    """Watches one or more folders and feeds new images into the pipeline.
+
+    Each root maps to a settings profile. New files become rows in the durable ``JobQueue``
+    with their root as the source; intake workers shared by all roots claim them in turn.
+    Besides exact ``file_hash`` matches, files whose perceptual hash is close to a design
+    already drafted are skipped or linked to that design instead of being drafted again.
+    """
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Session],
+        pipeline: PipelineEngine,
+        jobs: JobQueue,
+        workers: int = 1,
+        baseline_hash_workers: int = 4,
+        baseline_batch_size: int = 500,
+        settle_min_delay_ms: int = 50,
+        settle_max_delay_ms: int = 2000,
+        similar: Optional[PerceptualIndex] = None,
+        duplicate_action: str = "skip",
+    ):
+        if duplicate_action not in DUPLICATE_ACTIONS:
+            raise ValueError(f"Unsupported near-duplicate action {duplicate_action!r}; expected one of {', '.join(DUPLICATE_ACTIONS)}")
+        self.db_factory = db_factory
+        self.pipeline = pipeline
+        self.jobs = jobs
+        self.baseline_hash_workers = baseline_hash_workers
+        self.baseline_batch_size = baseline_batch_size
+        self.baselines: Dict[str, BaselineScan] = {}
+        self.roots: Dict[str, Dict[str, Any]] = {}
+        self.observer: Optional[Observer] = None
+        self.settler = FileSettler(self._dispatch, settle_min_delay_ms, settle_max_delay_ms)
+        self.running = False
+        self.processing = False
+        self.worker_count = max(1, workers)
+        self.worker_threads: List[threading.Thread] = []
+        self._worker_state: Dict[str, Dict[str, Optional[str]]] = {}
+        self._state_lock = threading.Lock()
+        self._inflight_hashes: set[str] = set()
+        self.similar = similar if duplicate_action != "off" else None
+        self.duplicate_action = duplicate_action
+        self._similar_lock = threading.Lock()
+
+    def start(self, folders: List[Dict[str, Any]]):
+        """Start watching ``folders``: dicts with ``path`` and optional ``recursive`` and ``profile``."""
+        if self.running:
+            return
+
+        self.roots = {}
+        for folder in folders:
+            folder_path = Path(folder["path"])
+            folder_path.mkdir(parents=True, exist_ok=True)
+            self.roots[str(folder_path)] = {
+                "recursive": bool(folder.get("recursive")),
+                "profile": folder.get("profile") or "",
+            }
+
+        started = time.time()
         self.running = True
+        self.settler.start()
         self.observer = Observer()
-        self.observer.schedule(NewImageHandler(self.work_queue), folder, recursive=False)
+        handler = NewImageHandler(self.settler)
+        for root, options in self.roots.items():
+            self.observer.schedule(handler, root, recursive=options["recursive"])
         self.observer.start()
+        self.start_workers()
+
+        self.baselines = {}
+        for root, options in self.roots.items():
+            scan = BaselineScan(
+                self.db_factory,
+                root,
+                cutoff=started,
+                recursive=options["recursive"],
+                hash_workers=self.baseline_hash_workers,
+                batch_size=self.baseline_batch_size,
+            )
+            self.baselines[root] = scan
+            scan.start()
 
-        self.worker_thread = threading.Thread(target=self._worker, daemon=True)
-        self.worker_thread.start()
+        log_event(f"Monitoring started for {', '.join(self.roots)}")
+
+    def start_workers(self):
+        """Start the intake workers; they also serve jobs queued by hand or in batches."""
+        with self._state_lock:
+            self.processing = True
+            self.worker_threads = [t for t in self.worker_threads if t.is_alive()]
+            for index in range(len(self.worker_threads), self.worker_count):
+                name = f"monitor-worker-{index + 1}"
+                thread = threading.Thread(target=self._worker, name=name, daemon=True)
+                self.worker_threads.append(thread)
+                thread.start()
+
+    def baseline_status(self) -> List[Dict[str, Any]]:
+        return [dict(scan.progress) for scan in self.baselines.values()]
 
     def stop(self):
         self.running = False
+        self.processing = False
         if self.observer:
             self.observer.stop()
             self.observer.join(timeout=5)
             self.observer = None
+        self.settler.stop()
 
-    def enqueue_path(self, image_path: str):
+    def enqueue_path(self, image_path: str, priority: int = 1) -> Optional[int]:
+        """Queue a file by hand; returns the job id, or None for a missing or unsupported file."""
         path = Path(image_path)
-        if path.suffix.lower() in ALLOWED_SUFFIXES and path.exists():
-            self.work_queue.put(str(path))
-            return True
-        return False
+        if is_image(image_path) and path.exists():
+            return self._dispatch(str(path), priority)
+        return None
+
+    def queue_depths(self) -> Dict[str, int]:
+        return self.jobs.depths()
+
+    def _dispatch(self, path: str, priority: int = 0) -> int:
+        return self.jobs.enqueue(path, self._root_for(path) or "manual", self.profile_for(path), priority)
+
+    def _root_for(self, path: str) -> Optional[str]:
+        """The most specific watched root containing ``path``."""
+        matches = [root for root in self.roots if path.startswith(os.path.join(root, ""))]
+        return max(matches, key=len) if matches else None
+
+    def profile_for(self, path: str) -> str:
+        root = self._root_for(path)
+        return self.roots[root]["profile"] if root else ""
+
+    def worker_status(self) -> List[Dict[str, Optional[str]]]:
+        with self._state_lock:
+            return [
+                {"worker": t.name, **self._worker_state.get(t.name, {"current_file": None, "stage": None})}
+                for t in self.worker_threads
+                if t.is_alive()
+            ]
+
+    def _set_worker_state(self, worker: str, **values: Optional[str]):
+        with self._state_lock:
+            state = self._worker_state.setdefault(worker, {"current_file": None, "stage": None})
+            state.update(values)
 
     def _worker(self):
-        while self.running:
-            try:
-                image_path = self.work_queue.get(timeout=1)
-            except queue.Empty:
+        worker = threading.current_thread().name
+        while self.processing:
+            job = self.jobs.claim(worker)
+            if job is None:
+                self.jobs.wait(timeout=1)
                 continue
 
-            self.current_file = image_path
+            self._set_worker_state(worker, current_file=job.path, stage="intake")
             db = self.db_factory()
             try:
-                self._process_single(db, image_path)
+                if not self._process_single(db, job.path, job.id, job.profile):
+                    self.jobs.complete(job.id)
             except Exception as exc:
-                log_event(db, f"Unhandled processing failure: {exc}", "ERROR", image_path)
+                db.rollback()
+                self.jobs.fail(job.id, str(exc))
+                log_event(f"Unhandled processing failure: {exc}", "ERROR", job.path)
             finally:
-                self.current_file = None
+                self._set_worker_state(worker, current_file=None, stage=None)
                 db.close()
-                self.work_queue.task_done()
 
     @staticmethod
     def _file_hash(path: str) -> str:
-        h = hashlib.sha256()
-        with open(path, "rb") as f:
-            h.update(f.read())
-        return h.hexdigest()
+        return file_digest(path)
 
-    def _mark_baseline(self, db: Session, path: str):
-        file_hash = self._file_hash(path)
-        exists = db.query(ProcessedImage).filter(ProcessedImage.path == path).first()
-        if not exists:
-            db.add(
-                ProcessedImage(
-                    path=path,
-                    file_hash=file_hash,
-                    status="baseline",
-                    message="Existing before monitoring started",
+    def _perceptual_hash(self, path: str) -> Optional[int]:
+        if self.similar is None:
+            return None
+        self._load_similar()
+        try:
+            return dhash(path)
+        except (OSError, ValueError):
+            # Unreadable images are left to fail in the pipeline with a proper error.
+            return None
+
+    def find_similar(self, path: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Drafted designs within the near-duplicate threshold of ``path``, closest first."""
+        perceptual = self._perceptual_hash(path)
+        if perceptual is None:
+            return []
+        return [{"path": key, "distance": distance} for key, distance in self.similar.search(perceptual, limit)]
+
+    def _load_similar(self):
+        """Index the perceptual hashes of designs already drafted or in progress, once."""
+        if self.similar.loaded:
+            return
+        with self._similar_lock:
+            if self.similar.loaded:
+                return
+            db = self.db_factory()
+            try:
+                rows = (
+                    db.query(ProcessedImage.path, ProcessedImage.perceptual_hash)
+                    .filter(ProcessedImage.perceptual_hash.isnot(None), ProcessedImage.status.in_(("processing", "done")))
+                    .all()
                 )
-            )
-            db.commit()
+            finally:
+                db.close()
+            # Hashes written by an older, shorter hash format are not comparable; skip them.
+            self.similar.load((path, from_hex(value)) for path, value in rows if len(value) == HASH_BITS // 4)
 
-    def _process_single(self, db: Session, path: str):
+    def _process_single(self, db: Session, path: str, job_id: int, profile: str = "") -> bool:
+        """Hash and de-duplicate ``path``; returns True when a pipeline run was started."""
         path_obj = Path(path)
         if not path_obj.exists():
-            return
+            return False
 
-        time.sleep(0.5)
         file_hash = self._file_hash(path)
-        existing = db.query(ProcessedImage).filter(ProcessedImage.file_hash == file_hash).first()
-        if existing:
-            return
+        with self._state_lock:
+            if file_hash in self._inflight_hashes:
+                return False
+            self._inflight_hashes.add(file_hash)
+        try:
+            existing = db.query(ProcessedImage).filter(ProcessedImage.file_hash == file_hash).first()
+            if existing:
+                return False
+            perceptual = self._perceptual_hash(path)
+            if perceptual is not None:
+                match = self.similar.claim(path, perceptual)
+                if match is not None:
+                    self._record_near_duplicate(db, path, file_hash, perceptual, *match)
+                    return False
+            try:
+                self._submit_run(db, path, file_hash, job_id, profile, perceptual)
+            except Exception:
+                if perceptual is not None:
+                    self.similar.discard(path)
+                raise
+            return True
+        finally:
+            with self._state_lock:
+                self._inflight_hashes.discard(file_hash)
+
+    def _processed_row(self, db: Session, path: str, file_hash: str, perceptual: Optional[int]) -> ProcessedImage:
+        signature = stat_signature(os.stat(path))
+        processed = db.query(ProcessedImage).filter(ProcessedImage.path == path).first()
+        if processed is None:
+            processed = ProcessedImage(path=path, file_hash=file_hash, **signature)
+            db.add(processed)
+        else:
+            processed.file_hash = file_hash
+            for key, value in signature.items():
+                setattr(processed, key, value)
+        processed.perceptual_hash = to_hex(perceptual) if perceptual is not None else None
+        processed.duplicate_of = None
+        processed.message = None
+        return processed
+
+    def _record_near_duplicate(
+        self, db: Session, path: str, file_hash: str, perceptual: int, match_path: str, distance: int
+    ):
+        processed = self._processed_row(db, path, file_hash, perceptual)
+        original = db.query(ProcessedImage.id).filter(ProcessedImage.path == match_path).first()
+        processed.duplicate_of = original.id if original else None
+        if self.duplicate_action == "link":
+            product = (
+                db.query(ProductRun.printify_product_id)
+                .filter(ProductRun.image_path == match_path, ProductRun.printify_product_id.isnot(None))
+                .order_by(ProductRun.id.desc())
+                .first()
+            )
+            processed.status = "linked"
+            processed.message = (
+                f"Linked to product {product.printify_product_id} of {match_path}"
+                if product
+                else f"Linked to {match_path}; its product is not created yet"
+            )
+        else:
+            processed.status = "duplicate"
+            processed.message = f"Near-duplicate of {match_path} ({distance} bits apart)"
+        message = processed.message
+        db.commit()
+        log_event(message, "WARNING", path)
 
-        processed = ProcessedImage(path=path, file_hash=file_hash, status="processing")
-        run = ProductRun(image_path=path, file_hash=file_hash, status="processing", success=False)
-        db.add(processed)
+    def _submit_run(
+        self, db: Session, path: str, file_hash: str, job_id: int, profile: str = "", perceptual: Optional[int] = None
+    ):
+        processed = self._processed_row(db, path, file_hash, perceptual)
+        processed.status = "processing"
+        run = ProductRun(
+            image_path=path,
+            file_hash=file_hash,
+            profile=profile or None,
+            status="queued",
+            stage="prepare",
+            success=False,
+        )
         db.add(run)
+        bump(db, "runs_created")
         db.commit()
         db.refresh(run)
+        self.jobs.mark_running(job_id, run.id)
+        self.pipeline.publish(run)
 
-        try:
-            result = self.processor(path)
-            run.status = "done"
-            run.success = True
-            run.analysis_json = result.get("analysis_json")
-            run.listing_json = result.get("listing_json")
-            run.printify_upload_id = result.get("printify_upload_id")
-            run.printify_product_id = result.get("printify_product_id")
-
-            processed.status = "done"
-            processed.message = f"Draft product created: {run.printify_product_id}"
-            log_event(db, "Product draft created successfully", "INFO", path)
-        except Exception as exc:
-            run.status = "error"
-            run.success = False
-            run.error_message = str(exc)
-
-            processed.status = "error"
-            processed.message = str(exc)
-            log_event(db, f"Processing failed: {exc}", "ERROR", path)
+        self._set_worker_state(threading.current_thread().name, stage="waiting:prepare")
+        self.pipeline.submit(PipelineJob(run_id=run.id, image_path=path, file_hash=file_hash, profile=profile))
 
-        db.commit()
+    def finish_run(self, db: Session, run: ProductRun, error: Optional[Exception]):
+        processed = db.query(ProcessedImage).filter(ProcessedImage.path == run.image_path).first()
+        if error is not None and self.similar is not None:
+            # A design that never became a product should not hold back its near-duplicates.
+            self.similar.discard(run.image_path)
+        if error is None:
+            if processed is not None:
+                processed.status = "done"
+                processed.message = f"Draft product created: {run.printify_product_id}"
+                if processed.perceptual_hash and self.similar is not None:
+                    # A retried run was dropped from the index when it first failed; it is a product now.
+                    self.similar.add(run.image_path, from_hex(processed.perceptual_hash))
+            log_event("Product draft created successfully", "INFO", run.image_path)
+        elif run.status == "aborted":
+            if processed is not None:
+                processed.status = "aborted"
+                processed.message = str(error)
+            log_event(f"Processing aborted at {run.stage} stage", "WARNING", run.image_path)
+        else:
+            if processed is not None:
+                processed.status = "error"
+                processed.message = str(error)
+            log_event(f"Processing failed at {run.stage} stage: {error}", "ERROR", run.image_path)
+        self.jobs.finish_run(db, run)
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.app.models import ProductRun
+from backend.app.services.config_store import SettingsSnapshot
+from backend.app.services.events import EventBus
+from backend.app.services.preprocess import thumbnail_url
+from backend.app.services.stats import bump
+
+STAGES = ("prepare", "analyze", "generate", "upload", "draft")
+
+
+@dataclass
+class PipelineJob:
+    run_id: int
+    image_path: str
+    file_hash: Optional[str] = None
+    profile: str = ""
+    caption_path: Optional[str] = None
+    settings: Optional[SettingsSnapshot] = field(default=None, repr=False)
+    analysis: Optional[Dict] = None
+    listing: Optional[Dict] = None
+    upload_id: Optional[str] = None
+    product_id: Optional[str] = None
+    cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+
+class RunAborted(RuntimeError):
+    pass
+
+
+StageHandler = Callable[[PipelineJob], None]
+CompletionHook = Callable[[Session, ProductRun, Optional[Exception]], None]
+
+
+def run_summary(run: ProductRun) -> Dict[str, Any]:
+    return {
+        "id": run.id,
+        "image_path": run.image_path,
+        "profile": run.profile,
+        "status": run.status,
+        "stage": run.stage,
+        "stage_status": json.loads(run.stage_status) if run.stage_status else {},
+        "success": run.success,
+        "printify_upload_id": run.printify_upload_id,
+        "printify_product_id": run.printify_product_id,
+        "error_message": run.error_message,
+        "created_at": run.created_at.isoformat() if run.created_at else None,
+        "thumbnail": thumbnail_url(run.file_hash),
+    }
+
+
+class PipelineEngine:
+    """Runs product drafts through independent prepare → analyze → generate → upload → draft stages.
+
+    Every stage owns a bounded queue and its own worker threads, so a slow stage applies
+    backpressure upstream instead of letting work pile up in memory. Stage progress and
+    outputs are persisted on the ``ProductRun`` so a failed run can resume from the stage
+    that failed.
+    """
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Session],
+        handlers: Dict[str, StageHandler],
+        workers: Dict[str, int],
+        queue_size: int = 8,
+        on_complete: Optional[CompletionHook] = None,
+        events: Optional[EventBus] = None,
+    ):
+        self.db_factory = db_factory
+        self.handlers = handlers
+        self.workers = {stage: max(1, int(workers.get(stage, 1))) for stage in STAGES}
+        self.queues: Dict[str, queue.Queue[PipelineJob]] = {stage: queue.Queue(maxsize=max(1, queue_size)) for stage in STAGES}
+        self.on_complete = on_complete
+        self.events = events
+        self.running = False
+        self.threads: List[threading.Thread] = []
+        self._active_runs: Dict[int, PipelineJob] = {}
+        self._worker_state: Dict[str, Dict[str, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            self.threads = [t for t in self.threads if t.is_alive()]
+            for stage in STAGES:
+                for index in range(self.workers[stage]):
+                    name = f"{stage}-{index + 1}"
+                    if any(t.name == name for t in self.threads):
+                        continue
+                    thread = threading.Thread(target=self._stage_worker, args=(stage,), name=name, daemon=True)
+                    self.threads.append(thread)
+                    thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def submit(self, job: PipelineJob, stage: str = STAGES[0]) -> bool:
+        """Queue a job at ``stage``; blocks while that stage's queue is full."""
+        if not self._claim(job):
+            return False
+        self.start()
+        self.queues[stage].put(job)
+        return True
+
+    def resume(self, run_id: int) -> str:
+        """Re-queue a failed run at the first stage whose output was not persisted."""
+        db = self.db_factory()
+        try:
+            run = db.query(ProductRun).filter(ProductRun.id == run_id).first()
+            if run is None:
+                raise LookupError(f"Run {run_id} not found")
+            if run.printify_product_id:
+                raise ValueError(f"Run {run_id} already has draft product {run.printify_product_id}")
+            job = PipelineJob(
+                run_id=run.id,
+                image_path=run.image_path,
+                file_hash=run.file_hash,
+                profile=run.profile or "",
+                analysis=json.loads(run.analysis_json) if run.analysis_json else None,
+                listing=json.loads(run.listing_json) if run.listing_json else None,
+                upload_id=run.printify_upload_id,
+            )
+            stage = self.resume_stage(job)
+            if not self._claim(job):
+                raise ValueError(f"Run {run_id} is already in progress")
+            if run.status in ("error", "aborted"):
+                # The totals count runs by current outcome; the time series keeps the failure.
+                bump(db, "runs_aborted" if run.status == "aborted" else "runs_failed", -1, bucketed=False)
+            run.status = "queued"
+            run.stage = stage
+            run.error_message = None
+            db.commit()
+            self.publish(run)
+        finally:
+            db.close()
+
+        self.start()
+        self.queues[stage].put(job)
+        return stage
+
+    @staticmethod
+    def resume_stage(job: PipelineJob) -> str:
+        if job.analysis is None:
+            # Preparing is cheap to repeat: it reuses the files written on the first attempt.
+            return "prepare"
+        if job.listing is None:
+            return "generate"
+        if not job.upload_id:
+            return "upload"
+        return "draft"
+
+    def abort(self, run_id: int) -> bool:
+        """Signal a queued or running job to stop; in-flight LLM requests are cancelled."""
+        with self._lock:
+            job = self._active_runs.get(run_id)
+        if job is None:
+            return False
+        job.cancel.set()
+        return True
+
+    def publish(self, run: ProductRun):
+        """Announce a committed run state change to event-stream clients."""
+        if self.events is not None and self.events.has_subscribers:
+            self.events.publish("run", run_summary(run))
+
+    def _claim(self, job: PipelineJob) -> bool:
+        with self._lock:
+            if job.run_id in self._active_runs:
+                return False
+            self._active_runs[job.run_id] = job
+            return True
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {stage: q.qsize() for stage, q in self.queues.items()}
+
+    def worker_status(self) -> List[Dict[str, Optional[str]]]:
+        with self._lock:
+            return [
+                {"worker": t.name, **self._worker_state.get(t.name, {"current_file": None, "stage": None})}
+                for t in self.threads
+                if t.is_alive()
+            ]
+
+    def _set_worker_state(self, worker: str, current_file: Optional[str], stage: Optional[str]):
+        with self._lock:
+            self._worker_state[worker] = {"current_file": current_file, "stage": stage}
+
+    def _stage_worker(self, stage: str):
+        worker = threading.current_thread().name
+        handler = self.handlers[stage]
+        next_stage = STAGES[STAGES.index(stage) + 1] if stage != STAGES[-1] else None
+
+        while self.running:
+            try:
+                job = self.queues[stage].get(timeout=1)
+            except queue.Empty:
+                continue
+
+            self._set_worker_state(worker, job.image_path, stage)
+            try:
+                if job.cancel.is_set():
+                    raise RunAborted("Run aborted")
+                self._record_stage(job, stage, "running")
+                handler(job)
+                self._record_stage(job, stage, "done")
+            except Exception as exc:
+                self._finish(job, stage, RunAborted("Run aborted") if job.cancel.is_set() else exc)
+            else:
+                if next_stage:
+                    self._set_worker_state(worker, job.image_path, f"waiting:{next_stage}")
+                    self.queues[next_stage].put(job)
+                else:
+                    self._finish(job, stage, None)
+            finally:
+                self._set_worker_state(worker, None, None)
+                self.queues[stage].task_done()
+
+    def _record_stage(self, job: PipelineJob, stage: str, state: str):
+        db = self.db_factory()
+        try:
+            run = db.query(ProductRun).filter(ProductRun.id == job.run_id).first()
+            if run is None:
+                return
+            statuses = json.loads(run.stage_status) if run.stage_status else {}
+            statuses[stage] = state
+            run.stage_status = json.dumps(statuses)
+            run.stage = stage
+            run.status = "processing"
+            self._persist_outputs(run, job)
+            db.commit()
+            self.publish(run)
+        finally:
+            db.close()
+
+    def _finish(self, job: PipelineJob, stage: str, error: Optional[Exception]):
+        db = self.db_factory()
+        try:
+            run = db.query(ProductRun).filter(ProductRun.id == job.run_id).first()
+            if run is not None:
+                statuses = json.loads(run.stage_status) if run.stage_status else {}
+                self._persist_outputs(run, job)
+                if error is None:
+                    run.status = "done"
+                    run.success = True
+                    run.error_message = None
+                    bump(db, "runs_succeeded")
+                else:
+                    state = "aborted" if isinstance(error, RunAborted) else "error"
+                    statuses[stage] = state
+                    run.status = state
+                    run.success = False
+                    run.error_message = str(error)
+                    bump(db, "runs_aborted" if state == "aborted" else "runs_failed")
+                run.stage = stage
+                run.stage_status = json.dumps(statuses)
+                db.commit()
+                self.publish(run)
+                if self.on_complete:
+                    self.on_complete(db, run, error)
+        finally:
+            db.close()
+            with self._lock:
+                self._active_runs.pop(job.run_id, None)
+
+    @staticmethod
+    def _persist_outputs(run: ProductRun, job: PipelineJob):
+        if job.analysis is not None:
+            run.analysis_json = json.dumps(job.analysis)
+        if job.listing is not None:
+            run.listing_json = json.dumps(job.listing)
+        if job.upload_id:
+            run.printify_upload_id = job.upload_id
+        if job.product_id:
+            run.printify_product_id = job.product_id
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from PIL import Image
+
+from backend.app.services.hashing import file_digest
+
+# Modes Image.reduce() handles directly; anything else is converted a strip at a time.
+REDUCIBLE_MODES = ("L", "LA", "RGB", "RGBA", "RGBa", "La")
+# Source rows converted per strip when shrinking a palette, 16-bit or CMYK image.
+STRIP_ROWS = 256
+
+
+def safe_name(file_hash: str) -> str:
+    """``file_hash`` as a file name; prefixed digests (``blake2b:…``) contain a colon."""
+    return file_hash.replace(":", "-")
+
+
+def thumbnail_url(file_hash: Optional[str]) -> Optional[str]:
+    return f"/thumbs/{safe_name(file_hash)}.webp" if file_hash else None
+
+
+def load_downscaled(path: str, size: int) -> Image.Image:
+    """Open ``path`` shrunk to fit within ``size`` pixels square, decoding as little as possible.
+
+    JPEGs are decoded straight at a reduced scale via ``draft``. Other formats are shrunk with
+    ``reduce`` (an integer box filter) before the final resample. Palette, 16-bit and CMYK
+    images are converted and reduced one strip at a time, so no full-size converted copy is
+    ever made.
+    """
+    with Image.open(path) as image:
+        image.draft("RGB", (size, size))
+        factor = min(image.width // size, image.height // size)
+        if image.mode in REDUCIBLE_MODES:
+            small = image.reduce(factor) if factor >= 2 else image.copy()
+        else:
+            mode = "RGBA" if "transparency" in image.info else "RGB"
+            small = _reduce_converted(image, mode, factor) if factor >= 2 else image.convert(mode)
+    small.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return small
+
+
+def _reduce_converted(image: Image.Image, mode: str, factor: int) -> Image.Image:
+    """``image.convert(mode).reduce(factor)`` without holding the full-size converted image."""
+    width, height = image.size
+    small = Image.new(mode, (-(-width // factor), -(-height // factor)))
+    # Strips start on multiples of ``factor`` so every reduce box falls inside one strip.
+    step = factor * max(1, STRIP_ROWS // factor)
+    for top in range(0, height, step):
+        strip = image.crop((0, top, width, min(height, top + step))).convert(mode)
+        small.paste(strip.reduce(factor), (0, top // factor))
+    return small
+
+
+def _save_atomic(image: Image.Image, path: Path, fmt: str, **options):
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    image.save(tmp, format=fmt, **options)
+    os.replace(tmp, path)
+
+
+@dataclass
+class PreparedImage:
+    file_hash: str
+    caption_path: str
+    thumbnail_path: str
+
+
+class ImagePreprocessor:
+    """Writes a caption-size JPEG and a WebP thumbnail per ``file_hash`` under ``storage_dir``.
+
+    Both come from one downscaled decode of the print file, and files that already exist are
+    reused, so identical images and resumed runs cost a stat call.
+    """
+
+    def __init__(self, storage_dir: str, caption_size: int = 384, thumbnail_size: int = 256, thumbnail_quality: int = 80):
+        self.caption_dir = Path(storage_dir) / "caption"
+        self.thumbnail_dir = Path(storage_dir) / "thumbs"
+        self.caption_size = caption_size
+        self.thumbnail_size = thumbnail_size
+        self.thumbnail_quality = thumbnail_quality
+        self.prepared = 0
+        self.reused = 0
+        self.caption_dir.mkdir(parents=True, exist_ok=True)
+        self.thumbnail_dir.mkdir(parents=True, exist_ok=True)
+
+    def paths(self, file_hash: str) -> PreparedImage:
+        name = safe_name(file_hash)
+        return PreparedImage(
+            file_hash,
+            str(self.caption_dir / f"{name}.jpg"),
+            str(self.thumbnail_dir / f"{name}.webp"),
+        )
+
+    def prepare(self, image_path: str, file_hash: Optional[str] = None) -> PreparedImage:
+        prepared = self.paths(file_hash or file_digest(image_path))
+        if os.path.exists(prepared.caption_path) and os.path.exists(prepared.thumbnail_path):
+            self.reused += 1
+            return prepared
+
+        image = load_downscaled(image_path, max(self.caption_size, self.thumbnail_size))
+        _save_atomic(image.convert("RGB"), Path(prepared.caption_path), "JPEG", quality=90)
+        image.thumbnail((self.thumbnail_size, self.thumbnail_size), Image.Resampling.LANCZOS)
+        _save_atomic(image, Path(prepared.thumbnail_path), "WEBP", quality=self.thumbnail_quality)
+        self.prepared += 1
+        return prepared
+
+    def stats(self) -> Dict[str, int]:
+        return {"prepared": self.prepared, "reused": self.reused}
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # NumPy is optional; pricing falls back to plain Python.
+    np = None
+
+MAX_VARIANTS = 100
+DEFAULT_PRICE = 1999
+# Below this many variants the NumPy setup costs more than the loop it replaces.
+VECTOR_MIN_VARIANTS = 64
+
+
+def variant_size(variant: Dict) -> Optional[str]:
+    options = variant.get("options") or {}
+    return options.get("size") if isinstance(options, dict) else None
+
+
+class PricingEngine:
+    """Prices Printify variants for one settings snapshot.
+
+    A variant starts from its own ``price`` when it has one, otherwise from ``base_price`` when
+    set, otherwise from its ``cost`` plus ``profit_percent``, otherwise ``DEFAULT_PRICE``.
+    ``pricing_rules`` then add a per-size markup, enforce a minimum margin over cost and
+    optionally round up to .99, whichever way the starting price was found.
+
+    Engines are built once per settings version (``ConfigStore.snapshot``), so an explicit
+    variant selection is normalized once and the same list is reused for every product.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        rules = config.get("pricing_rules") or {}
+        self.base_price = config.get("base_price")
+        self.profit_percent = float(config.get("profit_percent") or 30)
+        self.size_markup = {str(k).upper(): float(v) for k, v in (rules.get("size_markup_percent") or {}).items()}
+        self.min_margin_percent = rules.get("min_margin_percent")
+        self.round_to_99 = bool(rules.get("round_to_99"))
+        selected = config.get("selected_variants") or []
+        self.selection_error = (
+            f"Variant selection exceeds Printify limit of {MAX_VARIANTS}" if len(selected) > MAX_VARIANTS else None
+        )
+        self._selection = self._normalize(selected) if selected and not self.selection_error else None
+        self._default: Optional[tuple] = None
+
+    @property
+    def has_selection(self) -> bool:
+        return self._selection is not None or self.selection_error is not None
+
+    def selection(self) -> List[Dict]:
+        """The configured variant selection, normalized at build time. Shared: do not mutate."""
+        if self.selection_error:
+            raise RuntimeError(self.selection_error)
+        return self._selection or []
+
+    def default_selection(self, catalog_variants: List[Dict]) -> List[Dict]:
+        """Enable the first ``MAX_VARIANTS`` catalog variants at their computed prices.
+
+        The result is reused while the catalog cache keeps handing back the same variants list.
+        """
+        cached = self._default
+        if cached is not None and cached[0] is catalog_variants:
+            return cached[1]
+        variants = catalog_variants[:MAX_VARIANTS]
+        prices = self.price(variants)
+        selection = [{"variant_id": int(v["id"]), "enabled": True, "price": p} for v, p in zip(variants, prices)]
+        self._default = (catalog_variants, selection)
+        return selection
+
+    def price(self, variants: List[Dict]) -> List[int]:
+        """Price in cents for each variant.
+
+        An explicit ``price`` on the variant replaces the base price; the rules apply to it like
+        to a computed one.
+        """
+        if not variants:
+            return []
+        explicit = [v.get("price") for v in variants]
+        costs = [v.get("cost") for v in variants]
+        markups = [self.size_markup.get(str(variant_size(v) or "").upper(), 0.0) for v in variants]
+        if np is not None and len(variants) >= VECTOR_MIN_VARIANTS:
+            return self._price_vector(explicit, costs, markups)
+        return [self._price_one(e, cost, markup) for e, cost, markup in zip(explicit, costs, markups)]
+
+    def quote(self, variants: List[Dict]) -> List[Dict]:
+        """Per-variant price breakdown, for previewing rules against a catalog."""
+        prices = self.price(variants)
+        return [
+            {
+                "variant_id": v.get("id", v.get("variant_id")),
+                "title": v.get("title"),
+                "size": variant_size(v),
+                "cost": v.get("cost"),
+                "price": price,
+                "margin_percent": round((price / v["cost"] - 1) * 100, 1) if v.get("cost") else None,
+            }
+            for v, price in zip(variants, prices)
+        ]
+
+    def _base(self, explicit: Optional[float], cost: Optional[float]) -> float:
+        if explicit:
+            return float(explicit)
+        if self.base_price is not None:
+            return float(self.base_price) * 100
+        if cost is not None:
+            return float(cost) * (1 + self.profit_percent / 100)
+        return float(DEFAULT_PRICE)
+
+    def _price_one(self, explicit: Optional[float], cost: Optional[float], markup: float) -> int:
+        price = self._base(explicit, cost) * (1 + markup / 100)
+        if self.min_margin_percent is not None and cost is not None:
+            price = max(price, float(cost) * (1 + float(self.min_margin_percent) / 100))
+        cents = int(round(price))
+        return math.ceil((cents + 1) / 100) * 100 - 1 if self.round_to_99 else cents
+
+    def _price_vector(self, explicit: List[Optional[float]], costs: List[Optional[float]], markups: List[float]) -> List[int]:
+        has_cost = np.array([c is not None for c in costs])
+        cost = np.array([float(c) if c is not None else 0.0 for c in costs])
+        if self.base_price is not None:
+            price = np.full(len(costs), float(self.base_price) * 100)
+        else:
+            price = np.where(has_cost, cost * (1 + self.profit_percent / 100), float(DEFAULT_PRICE))
+        has_explicit = np.array([bool(e) for e in explicit])
+        price = np.where(has_explicit, np.array([float(e) if e else 0.0 for e in explicit]), price)
+        price = price * (1 + np.array(markups) / 100)
+        if self.min_margin_percent is not None:
+            floor = cost * (1 + float(self.min_margin_percent) / 100)
+            price = np.where(has_cost, np.maximum(price, floor), price)
+        cents = np.rint(price).astype(np.int64)
+        if self.round_to_99:
+            cents = np.ceil((cents + 1) / 100).astype(np.int64) * 100 - 1
+        return cents.tolist()
+
+    def _normalize(self, selected: List[Dict]) -> List[Dict]:
+        prices = self.price(selected)
+        return [
+            {"variant_id": int(v["variant_id"]), "enabled": bool(v.get("enabled", True)), "price": p}
+            for v, p in zip(selected, prices)
+        ]
@@ -1,18 +1,118 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import importlib.util
+import json
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
+from backend.app.services.catalog_cache import CatalogCache
+from backend.app.services.hashing import file_digest
+from backend.app.services.rate_limiter import PrintifyScheduler, default_scheduler
+from backend.app.services.upload_registry import UploadRegistry
 
-class PrintifyClient:
-    BASE_URL = "https://api.printify.com/v1"
+DEFAULT_BASE_URL = "https://api.printify.com/v1"
+REQUEST_TIMEOUT = 90
+POOL_SIZE = 16
 
-    def __init__(self, api_key: str, shop_id: str):
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def shared_session() -> requests.Session:
+    """Process-wide keep-alive session used by every sync client."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def shared_async_client() -> httpx.AsyncClient:
+    """Process-wide async connection pool; negotiates HTTP/2 when the ``h2`` package is installed."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+        )
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+class Base64UploadBody:
+    """JSON upload body whose base64 ``contents`` are encoded from disk chunk by chunk.
+
+    Only one raw chunk and its encoding are held in memory at a time, and the exact
+    length is known up front so the request is sent with a Content-Length header.
+    Iterating again restarts from the beginning, which lets retries resend the body.
+    """
+
+    RAW_CHUNK = 3 * 64 * 1024  # multiple of 3 so chunk encodings concatenate without padding
+
+    def __init__(self, image_path: str):
+        self.path = Path(image_path)
+        header = json.dumps({"file_name": self.path.name})
+        self.prefix = (header[:-1] + ', "contents": "').encode("utf-8")
+        self.suffix = b'"}'
+        size = self.path.stat().st_size
+        self.length = len(self.prefix) + 4 * ((size + 2) // 3) + len(self.suffix)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.prefix
+        with open(self.path, "rb") as f:
+            while raw := f.read(self.RAW_CHUNK):
+                yield base64.b64encode(raw)
+        yield self.suffix
+
+    async def aiter(self) -> AsyncIterator[bytes]:
+        yield self.prefix
+        with open(self.path, "rb") as f:
+            while raw := await asyncio.to_thread(f.read, self.RAW_CHUNK):
+                yield base64.b64encode(raw)
+        yield self.suffix
+
+
+class _PrintifyBase:
+    def __init__(
+        self,
+        api_key: str,
+        shop_id: str,
+        base_url: str = DEFAULT_BASE_URL,
+        scheduler: Optional[PrintifyScheduler] = None,
+        catalog: Optional[CatalogCache] = None,
+        uploads: Optional[UploadRegistry] = None,
+    ):
         self.api_key = api_key
         self.shop_id = shop_id
+        self.base_url = base_url.rstrip("/")
+        self.scheduler = scheduler or default_scheduler
+        self.catalog = catalog
+        self.uploads = uploads
 
     @property
     def headers(self) -> Dict[str, str]:
@@ -22,35 +122,38 @@ class PrintifyClient:
             "User-Agent": "printify-auto-local/1.0",
         }
 
-    def _request(self, method: str, path: str, **kwargs) -> Dict:
-        url = f"{self.BASE_URL}{path}"
-        response = requests.request(method, url, headers=self.headers, timeout=90, **kwargs)
-        if response.status_code >= 400:
-            raise RuntimeError(f"Printify API error {response.status_code}: {response.text}")
-        return response.json() if response.text else {}
-
-    def upload_image(self, image_path: str) -> Dict:
-        image_bytes = Path(image_path).read_bytes()
-        payload = {
-            "file_name": Path(image_path).name,
-            "contents": base64.b64encode(image_bytes).decode("utf-8"),
-        }
-        return self._request("POST", "/uploads/images.json", json=payload)
+    @staticmethod
+    def _parse(status_code: int, content: bytes) -> Dict:
+        if status_code >= 400:
+            raise RuntimeError(f"Printify API error {status_code}: {content.decode('utf-8', 'replace')}")
+        return orjson.loads(content) if content else {}
 
-    def get_variants(self, blueprint_id: int, provider_id: int) -> List[Dict]:
-        data = self._request(
-            "GET", f"/catalog/blueprints/{blueprint_id}/print_providers/{provider_id}/variants.json"
-        )
-        return data.get("variants", [])
+    @staticmethod
+    def _revalidation_headers(cached) -> Optional[Dict[str, str]]:
+        if cached is not None and cached.etag:
+            return {"If-None-Match": cached.etag}
+        return None
 
-    def get_print_areas(self, blueprint_id: int, provider_id: int) -> List[Dict]:
-        data = self._request(
-            "GET", f"/catalog/blueprints/{blueprint_id}/print_providers/{provider_id}/print_areas.json"
-        )
-        return data.get("print_areas", [])
+    def _previous_upload(self, file_hash: Optional[str]) -> Optional[Dict]:
+        if self.uploads is None or not file_hash:
+            return None
+        upload_id = self.uploads.lookup(file_hash, self.shop_id)
+        return {"id": upload_id, "reused": True} if upload_id else None
 
-    def get_mockup_candidates(self, blueprint_id: int, provider_id: int) -> List[Dict]:
-        areas = self.get_print_areas(blueprint_id, provider_id)
+    def _remember_upload(self, file_hash: Optional[str], image_path: str, upload: Dict):
+        if self.uploads is not None and file_hash and upload.get("id"):
+            self.uploads.record(file_hash, self.shop_id, str(upload["id"]), Path(image_path).name)
+
+    @staticmethod
+    def _variants_path(blueprint_id: int, provider_id: int) -> str:
+        return f"/catalog/blueprints/{blueprint_id}/print_providers/{provider_id}/variants.json"
+
+    @staticmethod
+    def _print_areas_path(blueprint_id: int, provider_id: int) -> str:
+        return f"/catalog/blueprints/{blueprint_id}/print_providers/{provider_id}/print_areas.json"
+
+    @staticmethod
+    def _mockup_options(areas: List[Dict]) -> List[Dict]:
         options: List[Dict] = []
         for area in areas:
             for placeholder in area.get("placeholders", []):
@@ -67,17 +170,8 @@ class PrintifyClient:
             dedup[opt["mockup_id"]] = opt
         return list(dedup.values())
 
-    def create_draft_product(
-        self,
-        title: str,
-        description: str,
-        tags: List[str],
-        blueprint_id: int,
-        provider_id: int,
-        uploaded_image_id: str,
-        variants: List[Dict],
-        mockup_ids: List[str],
-    ) -> Dict:
+    @staticmethod
+    def _enabled_variants(variants: List[Dict]) -> List[Dict]:
         enabled_variants = [
             {
                 "id": int(v["variant_id"]),
@@ -89,8 +183,20 @@ class PrintifyClient:
         ]
         if not enabled_variants:
             raise RuntimeError("No variants selected.")
+        return enabled_variants
 
-        print_areas = self.get_print_areas(blueprint_id, provider_id)
+    @staticmethod
+    def _draft_payload(
+        title: str,
+        description: str,
+        tags: List[str],
+        blueprint_id: int,
+        provider_id: int,
+        uploaded_image_id: str,
+        enabled_variants: List[Dict],
+        print_areas: List[Dict],
+        mockup_ids: List[str],
+    ) -> Dict:
         placeholders = []
         for area in print_areas:
             for p in area.get("placeholders", []):
@@ -119,7 +225,7 @@ class PrintifyClient:
                 }
             ]
 
-        payload = {
+        return {
             "title": title,
             "description": description,
             "blueprint_id": blueprint_id,
@@ -134,4 +240,274 @@ class PrintifyClient:
             ],
             "visible": False,
         }
-        return self._request("POST", f"/shops/{self.shop_id}/products.json", json=payload)
+
+
+class DraftTemplate:
+    """A draft-product request body compiled for one variant selection, print-area set and mockup choice.
+
+    Everything except the title, description, tags and upload id (the variants, print-area
+    wiring and placeholders) is serialized once; rendering a product encodes just those
+    four values and splices them into the precomputed bytes.
+    """
+
+    SLOT = "\u0000upload-id\u0000"
+
+    def __init__(self, blueprint_id: int, provider_id: int, variants: List[Dict], print_areas: List[Dict], mockup_ids: List[str]):
+        # Kept so the cache can tell, by identity, when the selection or catalog it was built from is replaced.
+        self.variants = variants
+        self.print_areas = print_areas
+        payload = _PrintifyBase._draft_payload(
+            "", "", [], blueprint_id, provider_id, self.SLOT, _PrintifyBase._enabled_variants(variants), print_areas, mockup_ids
+        )
+        fixed = {k: v for k, v in payload.items() if k not in ("title", "description", "tags")}
+        self._segments = orjson.dumps(fixed)[1:].split(orjson.dumps(self.SLOT))
+
+    def render(self, title: str, description: str, tags: List[str], uploaded_image_id: str) -> bytes:
+        head = orjson.dumps({"title": title, "description": description, "tags": tags})
+        return head[:-1] + b"," + orjson.dumps(uploaded_image_id).join(self._segments)
+
+
+class DraftTemplateCache:
+    """Compiled ``DraftTemplate``s keyed by blueprint, provider, mockups and variant selection.
+
+    Variant selections come from the pricing engine of a settings snapshot and are reused
+    as the same list until settings change, so the selection's identity stands in for the
+    settings version. A refreshed catalog replaces the print areas and forces a rebuild.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple, DraftTemplate] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, blueprint_id: int, provider_id: int, variants: List[Dict], print_areas: List[Dict], mockup_ids: List[str]
+    ) -> DraftTemplate:
+        key = (blueprint_id, provider_id, tuple(mockup_ids or ()), id(variants))
+        with self._lock:
+            template = self._entries.get(key)
+            if template is not None and template.variants is variants and template.print_areas is print_areas:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return template
+        template = DraftTemplate(blueprint_id, provider_id, variants, print_areas, mockup_ids)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = template
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return template
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+draft_templates = DraftTemplateCache()
+
+
+class PrintifyClient(_PrintifyBase):
+    def __init__(
+        self,
+        api_key: str,
+        shop_id: str,
+        base_url: str = DEFAULT_BASE_URL,
+        scheduler: Optional[PrintifyScheduler] = None,
+        catalog: Optional[CatalogCache] = None,
+        uploads: Optional[UploadRegistry] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        super().__init__(api_key, shop_id, base_url, scheduler, catalog, uploads)
+        self.session = session or shared_session()
+
+    def _send(self, method: str, path: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        url = f"{self.base_url}{path}"
+        headers = {**self.headers, **(headers or {})}
+        attempt = 0
+        while True:
+            self.scheduler.acquire(method, path)
+            try:
+                response = self.session.request(method, url, headers=headers, timeout=REQUEST_TIMEOUT, **kwargs)
+            except requests.RequestException:
+                delay = self.scheduler.retry_delay(method, path, attempt, None)
+                if delay is None:
+                    raise
+            else:
+                delay = None
+                if response.status_code >= 400:
+                    delay = self.scheduler.retry_delay(method, path, attempt, response.status_code, response.headers.get("Retry-After"))
+                if delay is None:
+                    return response
+            time.sleep(delay)
+            attempt += 1
+
+    def _request(self, method: str, path: str, **kwargs) -> Dict:
+        response = self._send(method, path, **kwargs)
+        return self._parse(response.status_code, response.content)
+
+    def _catalog_get(self, kind: str, blueprint_id: int, provider_id: int, path: str) -> Dict:
+        if self.catalog is None:
+            return self._request("GET", path)
+
+        cached = self.catalog.get(kind, blueprint_id, provider_id)
+        if cached is not None and self.catalog.is_fresh(cached):
+            self.catalog.record(hit=True)
+            return cached.data
+
+        response = self._send("GET", path, headers=self._revalidation_headers(cached))
+        if response.status_code == 304 and cached is not None:
+            return self.catalog.touch(kind, blueprint_id, provider_id, cached).data
+        self.catalog.record(hit=False)
+        data = self._parse(response.status_code, response.content)
+        self.catalog.put(kind, blueprint_id, provider_id, data, response.headers.get("ETag"))
+        return data
+
+    def upload_image(self, image_path: str, file_hash: Optional[str] = None) -> Dict:
+        if self.uploads is not None and not file_hash:
+            file_hash = file_digest(image_path)
+        previous = self._previous_upload(file_hash)
+        if previous:
+            return previous
+        upload = self._request("POST", "/uploads/images.json", data=Base64UploadBody(image_path))
+        self._remember_upload(file_hash, image_path, upload)
+        return upload
+
+    def get_variants(self, blueprint_id: int, provider_id: int) -> List[Dict]:
+        data = self._catalog_get("variants", blueprint_id, provider_id, self._variants_path(blueprint_id, provider_id))
+        return data.get("variants", [])
+
+    def get_print_areas(self, blueprint_id: int, provider_id: int) -> List[Dict]:
+        data = self._catalog_get("print_areas", blueprint_id, provider_id, self._print_areas_path(blueprint_id, provider_id))
+        return data.get("print_areas", [])
+
+    def get_mockup_candidates(self, blueprint_id: int, provider_id: int) -> List[Dict]:
+        return self._mockup_options(self.get_print_areas(blueprint_id, provider_id))
+
+    def create_draft_product(
+        self,
+        title: str,
+        description: str,
+        tags: List[str],
+        blueprint_id: int,
+        provider_id: int,
+        uploaded_image_id: str,
+        variants: List[Dict],
+        mockup_ids: List[str],
+    ) -> Dict:
+        print_areas = self.get_print_areas(blueprint_id, provider_id)
+        template = draft_templates.get(blueprint_id, provider_id, variants, print_areas, mockup_ids)
+        body = template.render(title, description, tags, uploaded_image_id)
+        return self._request("POST", f"/shops/{self.shop_id}/products.json", data=body)
+
+
+class AsyncPrintifyClient(_PrintifyBase):
+    """Non-blocking mirror of ``PrintifyClient`` for use inside ``async def`` routes."""
+
+    def __init__(
+        self,
+        api_key: str,
+        shop_id: str,
+        base_url: str = DEFAULT_BASE_URL,
+        scheduler: Optional[PrintifyScheduler] = None,
+        catalog: Optional[CatalogCache] = None,
+        uploads: Optional[UploadRegistry] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        super().__init__(api_key, shop_id, base_url, scheduler, catalog, uploads)
+        self.client = client or shared_async_client()
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        content_factory: Optional[Callable[[], AsyncIterator[bytes]]] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        url = f"{self.base_url}{path}"
+        headers = {**self.headers, **(headers or {})}
+        attempt = 0
+        while True:
+            await self.scheduler.acquire_async(method, path)
+            if content_factory is not None:
+                kwargs["content"] = content_factory()
+            try:
+                response = await self.client.request(method, url, headers=headers, timeout=REQUEST_TIMEOUT, **kwargs)
+            except httpx.TransportError:
+                delay = self.scheduler.retry_delay(method, path, attempt, None)
+                if delay is None:
+                    raise
+            else:
+                delay = None
+                if response.status_code >= 400:
+                    delay = self.scheduler.retry_delay(method, path, attempt, response.status_code, response.headers.get("Retry-After"))
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _request(self, method: str, path: str, **kwargs) -> Dict:
+        response = await self._send(method, path, **kwargs)
+        return self._parse(response.status_code, response.content)
+
+    async def _catalog_get(self, kind: str, blueprint_id: int, provider_id: int, path: str) -> Dict:
+        if self.catalog is None:
+            return await self._request("GET", path)
+
+        cached = self.catalog.peek(kind, blueprint_id, provider_id)
+        if cached is None:
+            cached = await asyncio.to_thread(self.catalog.get, kind, blueprint_id, provider_id)
+        if cached is not None and self.catalog.is_fresh(cached):
+            self.catalog.record(hit=True)
+            return cached.data
+
+        response = await self._send("GET", path, headers=self._revalidation_headers(cached))
+        if response.status_code == 304 and cached is not None:
+            refreshed = await asyncio.to_thread(self.catalog.touch, kind, blueprint_id, provider_id, cached)
+            return refreshed.data
+        self.catalog.record(hit=False)
+        data = self._parse(response.status_code, response.content)
+        await asyncio.to_thread(self.catalog.put, kind, blueprint_id, provider_id, data, response.headers.get("ETag"))
+        return data
+
+    async def upload_image(self, image_path: str, file_hash: Optional[str] = None) -> Dict:
+        if self.uploads is not None and not file_hash:
+            file_hash = await asyncio.to_thread(file_digest, image_path)
+        previous = await asyncio.to_thread(self._previous_upload, file_hash)
+        if previous:
+            return previous
+        body = Base64UploadBody(image_path)
+        upload = await self._request(
+            "POST", "/uploads/images.json", content_factory=body.aiter, headers={"Content-Length": str(len(body))}
+        )
+        await asyncio.to_thread(self._remember_upload, file_hash, image_path, upload)
+        return upload
+
+    async def get_variants(self, blueprint_id: int, provider_id: int) -> List[Dict]:
+        data = await self._catalog_get("variants", blueprint_id, provider_id, self._variants_path(blueprint_id, provider_id))
+        return data.get("variants", [])
+
+    async def get_print_areas(self, blueprint_id: int, provider_id: int) -> List[Dict]:
+        data = await self._catalog_get("print_areas", blueprint_id, provider_id, self._print_areas_path(blueprint_id, provider_id))
+        return data.get("print_areas", [])
+
+    async def get_mockup_candidates(self, blueprint_id: int, provider_id: int) -> List[Dict]:
+        return self._mockup_options(await self.get_print_areas(blueprint_id, provider_id))
+
+    async def create_draft_product(
+        self,
+        title: str,
+        description: str,
+        tags: List[str],
+        blueprint_id: int,
+        provider_id: int,
+        uploaded_image_id: str,
+        variants: List[Dict],
+        mockup_ids: List[str],
+    ) -> Dict:
+        print_areas = await self.get_print_areas(blueprint_id, provider_id)
+        template = draft_templates.get(blueprint_id, provider_id, variants, print_areas, mockup_ids)
+        body = template.render(title, description, tags, uploaded_image_id)
+        return await self._request("POST", f"/shops/{self.shop_id}/products.json", content=body)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Statuses where a non-idempotent request (product creation, uploads) was rejected before being applied.
+# 503 only counts when it carries Retry-After. A 502/504 comes from a gateway, and the write may still
+# have gone through upstream, so those are final and the pipeline's retry-from-stage decides what to do.
+SAFE_TO_REPEAT_STATUS = {429}
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations, so callers sleep outside the lock."""
+
+    def __init__(self, name: str, per_minute: float, burst: Optional[int] = None):
+        self.name = name
+        self.rate = max(per_minute, 1) / 60.0
+        self.capacity = float(burst or max(1, int(per_minute // 6)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiting = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take one token, returning how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def block_for(self, seconds: float):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "per_minute": round(self.rate * 60, 2),
+                "capacity": self.capacity,
+                "tokens": round(self.tokens, 2),
+                "waiting": self.waiting,
+                "blocked_for": round(max(0.0, self.blocked_until - now), 2),
+            }
+
+
+class PrintifyScheduler:
+    """Shared request budget for every Printify client in the process.
+
+    Each request draws from the global bucket plus the bucket for its endpoint family,
+    mirroring Printify's separate limits for catalog reads, uploads and product writes.
+    """
+
+    def __init__(
+        self,
+        global_per_minute: int = 600,
+        catalog_per_minute: int = 100,
+        upload_per_minute: int = 200,
+        product_per_minute: int = 60,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0,
+    ):
+        self.buckets = {
+            "global": TokenBucket("global", global_per_minute),
+            "catalog": TokenBucket("catalog", catalog_per_minute),
+            "upload": TokenBucket("upload", upload_per_minute),
+            "product": TokenBucket("product", product_per_minute),
+        }
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retries = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def classify(method: str, path: str) -> List[str]:
+        if path.startswith("/catalog/"):
+            return ["global", "catalog"]
+        if path.startswith("/uploads/"):
+            return ["global", "upload"]
+        if method.upper() != "GET" and "/products" in path:
+            return ["global", "product"]
+        return ["global"]
+
+    def _reserve(self, names: List[str]) -> float:
+        return max(self.buckets[name].reserve() for name in names)
+
+    def _set_waiting(self, names: List[str], delta: int):
+        with self._lock:
+            for name in names:
+                self.buckets[name].waiting += delta
+
+    def acquire(self, method: str, path: str):
+        names = self.classify(method, path)
+        wait = self._reserve(names)
+        if wait > 0:
+            self._set_waiting(names, 1)
+            try:
+                time.sleep(wait)
+            finally:
+                self._set_waiting(names, -1)
+
+    async def acquire_async(self, method: str, path: str):
+        names = self.classify(method, path)
+        wait = self._reserve(names)
+        if wait > 0:
+            self._set_waiting(names, 1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._set_waiting(names, -1)
+
+    def retry_delay(self, method: str, path: str, attempt: int, status: Optional[int], retry_after: Optional[str] = None) -> Optional[float]:
+        """Return seconds to wait before retrying, or None when the failure is final.
+
+        ``status`` is None for transport errors, which are only retried for reads.
+        """
+        if attempt >= self.max_retries:
+            return None
+        idempotent = method.upper() == "GET"
+        if status is None:
+            if not idempotent:
+                return None
+        elif idempotent:
+            if status not in RETRYABLE_STATUS:
+                return None
+        elif status not in SAFE_TO_REPEAT_STATUS and not (status == 503 and retry_after):
+            return None
+
+        delay = self.parse_retry_after(retry_after)
+        if delay is None:
+            ceiling = min(self.backoff_cap, self.backoff_base * (2**attempt))
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+
+        with self._lock:
+            self.retries += 1
+            if status == 429:
+                self.throttled += 1
+        if status == 429:
+            for name in self.classify(method, path):
+                self.buckets[name].block_for(delay)
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+    def snapshot(self) -> Dict:
+        buckets = {name: bucket.snapshot() for name, bucket in self.buckets.items()}
+        return {
+            "buckets": buckets,
+            "queue_depth": buckets["global"]["waiting"],
+            "retries": self.retries,
+            "throttled": self.throttled,
+        }
+
+
+default_scheduler = PrintifyScheduler()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import threading
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from PIL import Image
+
+from backend.app.services.preprocess import load_downscaled
+
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+BAND_BITS = 16
+# Thin designs (a line of text) need this much resolution for their content box to hash stably.
+SOURCE_SIZE = 512
+DUPLICATE_ACTIONS = ("skip", "link", "off")
+# Grey levels a pixel may differ from the corner colour and still count as opaque background.
+BACKGROUND_TOLERANCE = 64
+
+
+def content_box(path: str) -> Image.Image:
+    """Grayscale copy of the design itself: transparency flattened onto white, empty margins cropped.
+
+    Print files are mostly empty canvas; hashing the whole canvas makes unrelated designs look alike.
+    Flattening onto white also makes a transparent file and its white-background export hash the same.
+    """
+    image = load_downscaled(path, SOURCE_SIZE)
+    if image.mode in ("RGBA", "LA", "RGBa", "La"):
+        image = image.convert("RGBA")
+        box = image.getchannel("A").point(lambda a: 255 if a > 127 else 0).getbbox()
+        flat = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        flat.alpha_composite(image)
+        gray = flat.convert("L")
+    else:
+        box = None
+        gray = image.convert("L")
+    if box is None or box == (0, 0) + gray.size:
+        corner = gray.getpixel((0, 0))
+        box = gray.point(lambda v: 255 if abs(v - corner) > BACKGROUND_TOLERANCE else 0).getbbox()
+    content = gray.crop(box) if box else gray
+    # Pad to a square rather than stretch, so a one-pixel change in a thin box stays a small change.
+    side = max(content.size)
+    square = Image.new("L", (side, side), 255)
+    square.paste(content, ((side - content.width) // 2, (side - content.height) // 2))
+    return square
+
+
+def dhash(path: str) -> int:
+    """256-bit difference hash: one bit per horizontally adjacent pixel pair of a 17x16 copy of the content box.
+
+    It survives re-encoding, metadata changes, rescaling, small crops and moving the design on
+    its canvas, which change the file bytes (and so ``file_digest``) but not the picture.
+    """
+    pixels = content_box(path).resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS).tobytes()
+    value = 0
+    for row in range(0, (HASH_SIZE + 1) * HASH_SIZE, HASH_SIZE + 1):
+        for col in range(row, row + HASH_SIZE):
+            value = value << 1 | (pixels[col] < pixels[col + 1])
+    return value
+
+
+def to_hex(value: int) -> str:
+    return f"{value:0{HASH_BITS // 4}x}"
+
+
+def from_hex(value: str) -> int:
+    return int(value, 16)
+
+
+class PerceptualIndex:
+    """In-memory index of design hashes answering "anything within ``threshold`` bits?".
+
+    Uses multi-index hashing: the hash is cut into 16-bit bands, each with its own exact-match
+    table. Two hashes within ``threshold`` bits differ in at most ``threshold // bands`` bits
+    of at least one band, so a lookup probes each table with the query band and its
+    neighbours within that radius, and only compares the full hash of designs found there
+    instead of scanning every design.
+    """
+
+    def __init__(self, threshold: int = 10):
+        self.threshold = max(0, min(threshold, HASH_BITS - 1))
+        self.bands = [(shift, (1 << BAND_BITS) - 1) for shift in range(0, HASH_BITS, BAND_BITS)]
+        radius = self.threshold // len(self.bands)
+        self._probes = [
+            sum(1 << bit for bit in bits) for r in range(radius + 1) for bits in combinations(range(BAND_BITS), r)
+        ]
+        self.loaded = False
+        self.lookups = 0
+        self.matches = 0
+        self._tables: List[Dict[int, Set[str]]] = [{} for _ in self.bands]
+        self._hashes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def load(self, items: Iterable[Tuple[str, int]]):
+        with self._lock:
+            for key, value in items:
+                self._add(key, value)
+            self.loaded = True
+
+    def add(self, key: str, value: int):
+        with self._lock:
+            self._add(key, value)
+
+    def discard(self, key: str):
+        with self._lock:
+            if key in self._hashes:
+                self._remove(key)
+
+    def search(self, value: int, limit: int = 10) -> List[Tuple[str, int]]:
+        """Indexed keys within ``threshold`` bits of ``value`` as ``(key, distance)``, closest first."""
+        with self._lock:
+            return self._search(value)[:limit]
+
+    def claim(self, key: str, value: int) -> Optional[Tuple[str, int]]:
+        """Return the closest indexed design to ``value``, or index ``key`` when there is none.
+
+        Checking and adding under one lock means two near-identical files arriving together
+        cannot both be treated as new.
+        """
+        with self._lock:
+            found = self._search(value, exclude=key)
+            if found:
+                self.matches += 1
+                return found[0]
+            self._add(key, value)
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "designs": len(self._hashes),
+            "threshold": self.threshold,
+            "probes": len(self._probes) * len(self.bands),
+            "lookups": self.lookups,
+            "matches": self.matches,
+        }
+
+    def _add(self, key: str, value: int):
+        if key in self._hashes:
+            self._remove(key)
+        self._hashes[key] = value
+        for table, (shift, mask) in zip(self._tables, self.bands):
+            table.setdefault((value >> shift) & mask, set()).add(key)
+
+    def _remove(self, key: str):
+        value = self._hashes.pop(key)
+        for table, (shift, mask) in zip(self._tables, self.bands):
+            keys = table[(value >> shift) & mask]
+            keys.discard(key)
+            if not keys:
+                del table[(value >> shift) & mask]
+
+    def _search(self, value: int, exclude: Optional[str] = None) -> List[Tuple[str, int]]:
+        self.lookups += 1
+        seen: Set[str] = set()
+        found = []
+        for table, (shift, mask) in zip(self._tables, self.bands):
+            band = (value >> shift) & mask
+            for probe in self._probes:
+                for key in table.get(band ^ probe, ()):
+                    if key in seen or key == exclude:
+                        continue
+                    seen.add(key)
+                    distance = (self._hashes[key] ^ value).bit_count()
+                    if distance <= self.threshold:
+                        found.append((key, distance))
+        found.sort(key=lambda item: item[1])
+        return found
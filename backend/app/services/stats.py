@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.models import ProcessingLog, ProductRun, StatBucket, StatCounter
+
+COUNTERS = ("runs_created", "runs_succeeded", "runs_failed", "runs_aborted", "logs", "logs_error")
+
+
+def bucket_start(at: datetime, seconds: Optional[int] = None) -> datetime:
+    seconds = seconds or settings.stats_bucket_seconds
+    epoch = int((at - datetime(1970, 1, 1)).total_seconds())
+    return datetime(1970, 1, 1) + timedelta(seconds=epoch - epoch % seconds)
+
+
+def bump(db: Session, name: str, amount: int = 1, at: Optional[datetime] = None, bucketed: bool = True):
+    """Add ``amount`` to a counter (and its time bucket) inside the caller's transaction."""
+    bump_many(db, [(name, at or datetime.utcnow(), amount)], bucketed)
+
+
+def bump_many(db: Session, events: Iterable[Tuple[str, datetime, int]], bucketed: bool = True):
+    totals: Counter = Counter()
+    buckets: Counter = Counter()
+    for name, at, amount in events:
+        totals[name] += amount
+        if bucketed:
+            buckets[(name, bucket_start(at))] += amount
+
+    for name, amount in totals.items():
+        stmt = insert(StatCounter).values(name=name, value=amount)
+        db.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={"value": StatCounter.value + stmt.excluded.value}))
+    for (name, start), amount in buckets.items():
+        stmt = insert(StatBucket).values(name=name, bucket_start=start, value=amount)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["name", "bucket_start"], set_={"value": StatBucket.value + stmt.excluded.value}
+            )
+        )
+
+
+def counters(db: Session) -> Dict[str, int]:
+    values = dict.fromkeys(COUNTERS, 0)
+    values.update({row.name: row.value for row in db.query(StatCounter.name, StatCounter.value)})
+    return values
+
+
+def series(db: Session, names: Iterable[str], since: datetime) -> Dict[str, List[Tuple[str, int]]]:
+    """Per-bucket values for ``names`` from ``since`` onwards, oldest first."""
+    names = list(names)
+    result: Dict[str, List[Tuple[str, int]]] = {name: [] for name in names}
+    rows = (
+        db.query(StatBucket.name, StatBucket.bucket_start, StatBucket.value)
+        .filter(StatBucket.name.in_(names), StatBucket.bucket_start >= bucket_start(since))
+        .order_by(StatBucket.bucket_start)
+    )
+    for name, start, value in rows:
+        result[name].append((start.isoformat(), value))
+    return result
+
+
+def window_totals(db: Session, names: Iterable[str], since: datetime) -> Dict[str, int]:
+    names = list(names)
+    totals = dict.fromkeys(names, 0)
+    rows = (
+        db.query(StatBucket.name, func.sum(StatBucket.value))
+        .filter(StatBucket.name.in_(names), StatBucket.bucket_start >= bucket_start(since))
+        .group_by(StatBucket.name)
+    )
+    totals.update({name: int(value or 0) for name, value in rows})
+    return totals
+
+
+def reconcile(db: Session):
+    """Recount every counter from the source tables. Time buckets are not backfilled."""
+    values = {
+        "runs_created": db.query(func.count(ProductRun.id)).scalar() or 0,
+        "runs_succeeded": db.query(func.count(ProductRun.id)).filter(ProductRun.success.is_(True)).scalar() or 0,
+        "runs_failed": db.query(func.count(ProductRun.id)).filter(ProductRun.status == "error").scalar() or 0,
+        "runs_aborted": db.query(func.count(ProductRun.id)).filter(ProductRun.status == "aborted").scalar() or 0,
+        "logs": db.query(func.count(ProcessingLog.id)).scalar() or 0,
+        "logs_error": db.query(func.count(ProcessingLog.id)).filter(ProcessingLog.level == "ERROR").scalar() or 0,
+    }
+    for name, value in values.items():
+        stmt = insert(StatCounter).values(name=name, value=value)
+        db.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={"value": stmt.excluded.value}))
+    db.commit()
+    return values
+
+
+def initialize(db_factory: Callable[[], Session]):
+    """Seed the counters from existing rows the first time a database runs with them."""
+    db = db_factory()
+    try:
+        if db.query(StatCounter.id).first() is None:
+            reconcile(db)
+    finally:
+        db.close()
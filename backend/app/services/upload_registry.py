@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.app.models import PrintifyUpload
+
+
+class UploadRegistry:
+    """Maps image content hashes to Printify upload ids so identical files are sent only once per shop."""
+
+    def __init__(self, db_factory: Callable[[], Session]):
+        self.db_factory = db_factory
+
+    def lookup(self, file_hash: str, shop_id: str) -> Optional[str]:
+        db = self.db_factory()
+        try:
+            row = (
+                db.query(PrintifyUpload)
+                .filter(PrintifyUpload.file_hash == file_hash, PrintifyUpload.shop_id == shop_id)
+                .first()
+            )
+            return row.upload_id if row else None
+        finally:
+            db.close()
+
+    def record(self, file_hash: str, shop_id: str, upload_id: str, file_name: str):
+        db = self.db_factory()
+        try:
+            db.add(PrintifyUpload(file_hash=file_hash, shop_id=shop_id, upload_id=upload_id, file_name=file_name))
+            db.commit()
+        except IntegrityError:
+            # A concurrent upload of the same bytes already registered an id; keep that one.
+            db.rollback()
+        finally:
+            db.close()
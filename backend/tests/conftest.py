@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a scratch directory before any test imports it.
+_scratch = tempfile.mkdtemp(prefix="printify-tests-")
+os.environ.setdefault("DATABASE_PATH", os.path.join(_scratch, "app.db"))
+os.environ.setdefault("STORAGE_DIR", os.path.join(_scratch, "data"))
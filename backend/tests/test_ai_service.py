@@ -0,0 +1,67 @@
+import itertools
+import uuid
+
+import pytest
+
+from backend.app.core.database import SessionLocal, sync_schema
+from backend.app.services.ai_cache import AIResultCache
+from backend.app.services.ai_service import LocalAIService
+from backend.app.services.captioner import CaptionWorker
+
+
+class NoBlip(CaptionWorker):
+    """Caption worker for an install without torch/transformers, whatever this machine has."""
+
+    def _load(self):
+        self.error = "No module named 'torch'"
+        self._ready.set()
+
+
+@pytest.fixture
+def service(monkeypatch):
+    sync_schema()
+    ai = LocalAIService("test-model", caption_worker=NoBlip(), cache=AIResultCache(SessionLocal))
+    ai.calls = 0
+    # Every answer differs, like a sampling LLM, so a cache miss would show up as a different result.
+    counter = itertools.count()
+
+    def fake_ollama(prompt, cancel=None):
+        ai.calls += 1
+        n = next(counter)
+        return {
+            "analysis": {"theme": f"theme {n}"},
+            "listing": {"title": f"title {n}"},
+            "theme": f"theme {n}",
+            "title": f"title {n}",
+        }
+
+    monkeypatch.setattr(ai, "_ollama_json", fake_ollama)
+    return ai
+
+
+@pytest.mark.parametrize("combined", [False, True], ids=["separate", "combined"])
+def test_rerun_without_blip_reuses_cached_results(service, combined):
+    service.combined = combined
+    file_hash = uuid.uuid4().hex
+    # Listings are keyed by analysis content, so each test needs its own caption to avoid sharing entries.
+    path = f"designs/cat_{file_hash}.png"
+
+    def run():
+        if combined:
+            return service.analyze_and_generate(path, file_hash=file_hash)
+        analysis = service.analyze_image(path, file_hash=file_hash)
+        return analysis, service.generate_listing(analysis)
+
+    first = run()
+    calls = service.calls
+    assert first[0]["captioner_warning"]
+    assert run() == first
+    assert service.calls == calls == (1 if combined else 2)
+
+
+def test_ollama_fallback_is_not_cached(service, monkeypatch):
+    monkeypatch.setattr(service, "_ollama_json", lambda prompt, cancel=None: {})
+    file_hash = uuid.uuid4().hex
+    analysis = service.analyze_image("designs/cat_shirt.png", file_hash=file_hash)
+    assert "llm_warning" in analysis
+    assert service.cache.get("analysis", service._analysis_key("designs/cat_shirt.png", file_hash)) is None
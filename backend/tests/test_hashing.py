@@ -0,0 +1,28 @@
+import os
+
+from backend.app.services.hashing import entry_signature, stat_signature
+
+
+class WindowsEntry:
+    """``os.DirEntry`` as it behaves on Windows: ``stat()`` has no inode, ``inode()`` has the real one."""
+
+    def __init__(self, path):
+        self.path = path
+        self._stat = os.stat(path)
+
+    def stat(self):
+        fields = list(self._stat)
+        fields[1] = 0  # st_ino
+        return os.stat_result(fields, {"st_mtime_ns": self._stat.st_mtime_ns})
+
+    def inode(self):
+        return self._stat.st_ino
+
+
+def test_entry_signature_matches_intake_signature(tmp_path):
+    image = tmp_path / "design.png"
+    image.write_bytes(b"png")
+    intake = stat_signature(os.stat(image))
+    with os.scandir(tmp_path) as it:
+        assert entry_signature(next(it)) == intake
+    assert entry_signature(WindowsEntry(str(image))) == intake
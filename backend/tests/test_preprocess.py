@@ -0,0 +1,39 @@
+import os
+
+import pytest
+from PIL import Image, ImageChops
+
+from backend.app.services.preprocess import STRIP_ROWS, load_downscaled
+
+
+@pytest.fixture
+def palette_png(tmp_path):
+    path = tmp_path / "design.png"
+    noise = Image.frombytes("RGB", (400, 300), os.urandom(400 * 300 * 3))
+    image = noise.quantize(64).resize((4000, 3000), Image.Resampling.NEAREST)
+    image.info["transparency"] = 0
+    image.save(path, transparency=0)
+    return str(path)
+
+
+def test_large_palette_png_is_never_converted_at_full_size(palette_png, monkeypatch):
+    converted = []
+    convert = Image.Image.convert
+
+    def recording_convert(self, *args, **kwargs):
+        converted.append(self.size)
+        return convert(self, *args, **kwargs)
+
+    monkeypatch.setattr(Image.Image, "convert", recording_convert)
+    small = load_downscaled(palette_png, 512)
+    monkeypatch.undo()
+
+    assert small.mode == "RGBA"
+    assert max(small.size) == 512
+    # Only strips and already-reduced copies are converted, never the 4000x3000 source.
+    assert converted and max(w * h for w, h in converted) <= 4000 * STRIP_ROWS
+
+    with Image.open(palette_png) as image:
+        expected = image.convert("RGBA").reduce(5)
+    expected.thumbnail((512, 512), Image.Resampling.LANCZOS)
+    assert ImageChops.difference(small, expected).getbbox() is None
@@ -0,0 +1,196 @@
+import asyncio
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+
+from backend.app.core.database import SessionLocal, sync_schema
+from backend.app.services.catalog_cache import CatalogCache
+from backend.app.services.printify_service import AsyncPrintifyClient, PrintifyClient
+from backend.app.services.rate_limiter import PrintifyScheduler
+
+VARIANTS_PATH = "/catalog/blueprints/6/print_providers/1/variants.json"
+
+
+class StubPrintify:
+    """Local HTTP server standing in for the Printify API.
+
+    Responses are queued per ``METHOD path``; each request pops the next one, and the last one
+    is repeated once the queue runs down. Every request is recorded for assertions.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                stub.requests.append({"method": self.command, "path": self.path, "headers": dict(self.headers), "body": body})
+                queue = stub.routes.get(f"{self.command} {self.path}") or [(404, {}, {"error": "no route"})]
+                status, headers, payload = queue.pop(0) if len(queue) > 1 else queue[0]
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def respond(self, method, path, *responses):
+        self.routes[f"{method} /v1{path}"] = list(responses)
+
+    def calls(self, method, path):
+        return [r for r in self.requests if r["method"] == method and r["path"] == f"/v1{path}"]
+
+
+@pytest.fixture
+def stub():
+    server = StubPrintify()
+    server.thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+@pytest.fixture
+def scheduler():
+    return PrintifyScheduler(max_retries=3, backoff_base=0.01, backoff_cap=0.02)
+
+
+@pytest.fixture
+def catalog():
+    sync_schema()
+    return CatalogCache(SessionLocal, ttl_seconds=0)
+
+
+def sync_client(stub, scheduler, **kwargs):
+    return PrintifyClient("key", "shop", base_url=stub.url, scheduler=scheduler, session=requests.Session(), **kwargs)
+
+
+def run_async(stub, scheduler, call, **kwargs):
+    async def main():
+        async with httpx.AsyncClient() as http:
+            client = AsyncPrintifyClient("key", "shop", base_url=stub.url, scheduler=scheduler, client=http, **kwargs)
+            return await call(client)
+
+    return asyncio.run(main())
+
+
+def fetch_variants_sync(stub, scheduler, **kwargs):
+    return sync_client(stub, scheduler, **kwargs).get_variants(6, 1)
+
+
+def fetch_variants_async(stub, scheduler, **kwargs):
+    return run_async(stub, scheduler, lambda client: client.get_variants(6, 1), **kwargs)
+
+
+def upload_sync(stub, scheduler, path):
+    return sync_client(stub, scheduler).upload_image(path)
+
+
+def upload_async(stub, scheduler, path):
+    return run_async(stub, scheduler, lambda client: client.upload_image(path))
+
+
+FETCHERS = [pytest.param(fetch_variants_sync, id="sync"), pytest.param(fetch_variants_async, id="async")]
+UPLOADERS = [pytest.param(upload_sync, id="sync"), pytest.param(upload_async, id="async")]
+
+
+@pytest.mark.parametrize("fetch", FETCHERS)
+def test_catalog_fetch(stub, scheduler, fetch):
+    stub.respond("GET", VARIANTS_PATH, (200, {}, {"variants": [{"id": 1, "title": "S"}]}))
+    assert fetch(stub, scheduler) == [{"id": 1, "title": "S"}]
+    request = stub.calls("GET", VARIANTS_PATH)[0]
+    assert request["headers"]["Authorization"] == "Bearer key"
+
+
+@pytest.mark.parametrize("fetch", FETCHERS)
+def test_retries_with_backoff_then_succeeds(stub, scheduler, fetch):
+    stub.respond(
+        "GET",
+        VARIANTS_PATH,
+        (503, {}, {"error": "busy"}),
+        (429, {"Retry-After": "0"}, {"error": "slow down"}),
+        (200, {}, {"variants": [{"id": 2}]}),
+    )
+    assert fetch(stub, scheduler) == [{"id": 2}]
+    assert len(stub.calls("GET", VARIANTS_PATH)) == 3
+    assert scheduler.retries == 2
+    assert scheduler.throttled == 1
+
+
+@pytest.mark.parametrize("fetch", FETCHERS)
+def test_gives_up_after_max_retries(stub, scheduler, fetch):
+    stub.respond("GET", VARIANTS_PATH, (503, {}, {"error": "down"}))
+    with pytest.raises(RuntimeError, match="503"):
+        fetch(stub, scheduler)
+    assert len(stub.calls("GET", VARIANTS_PATH)) == scheduler.max_retries + 1
+
+
+@pytest.mark.parametrize("fetch", FETCHERS)
+def test_catalog_revalidates_with_etag(stub, scheduler, catalog, fetch):
+    stub.respond(
+        "GET",
+        VARIANTS_PATH,
+        (200, {"ETag": '"v1"'}, {"variants": [{"id": 3}]}),
+        (304, {"ETag": '"v1"'}, None),
+    )
+    assert fetch(stub, scheduler, catalog=catalog) == [{"id": 3}]
+    # ttl_seconds=0: the second read revalidates and the 304 reuses the cached body.
+    assert fetch(stub, scheduler, catalog=catalog) == [{"id": 3}]
+    second = stub.calls("GET", VARIANTS_PATH)[1]
+    assert second["headers"]["If-None-Match"] == '"v1"'
+    catalog.invalidate()
+
+
+@pytest.mark.parametrize("upload", UPLOADERS)
+def test_upload_streams_base64_body(stub, scheduler, upload, tmp_path):
+    image = tmp_path / "design.png"
+    image.write_bytes(bytes(range(256)) * 3000)
+    stub.respond("POST", "/uploads/images.json", (200, {}, {"id": "up-1"}))
+    assert upload(stub, scheduler, str(image))["id"] == "up-1"
+    request = stub.calls("POST", "/uploads/images.json")[0]
+    assert int(request["headers"]["Content-Length"]) == len(request["body"])
+    payload = json.loads(request["body"])
+    assert payload["file_name"] == "design.png"
+    assert base64.b64decode(payload["contents"]) == image.read_bytes()
+
+
+@pytest.mark.parametrize("upload", UPLOADERS)
+def test_upload_retry_resends_whole_body(stub, scheduler, upload, tmp_path):
+    image = tmp_path / "design.png"
+    image.write_bytes(b"\x89PNG" * 100000)
+    stub.respond("POST", "/uploads/images.json", (503, {"Retry-After": "0"}, {"error": "busy"}), (200, {}, {"id": "up-2"}))
+    assert upload(stub, scheduler, str(image))["id"] == "up-2"
+    first, second = stub.calls("POST", "/uploads/images.json")
+    assert first["body"] == second["body"]
+    assert base64.b64decode(json.loads(second["body"])["contents"]) == image.read_bytes()
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504])
+@pytest.mark.parametrize("upload", UPLOADERS)
+def test_upload_is_not_repeated_on_ambiguous_failure(stub, scheduler, upload, tmp_path, status):
+    image = tmp_path / "design.png"
+    image.write_bytes(b"data")
+    # A gateway error does not say whether the upload was stored, so resending could duplicate it.
+    stub.respond("POST", "/uploads/images.json", (status, {}, {"error": "boom"}), (200, {}, {"id": "up-3"}))
+    with pytest.raises(RuntimeError, match=str(status)):
+        upload(stub, scheduler, str(image))
+    assert len(stub.calls("POST", "/uploads/images.json")) == 1
@@ -0,0 +1,85 @@
+import itertools
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from backend.app.services.similarity import PerceptualIndex, dhash
+
+TEXTS = ["LIFE IS GOOD", "COFFEE\nFIRST", "BORN TO\nFISH", "WORLD'S BEST\nDAD", "CAT MOM", "NOPE", "GAME\nOVER", "CAT DAD"]
+
+
+def _font(size):
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def text_design(text, size=(1500, 1800)):
+    """A typical print file: dark text on a mostly empty transparent canvas."""
+    image = Image.new("RGBA", size, (0, 0, 0, 0))
+    ImageDraw.Draw(image).multiline_text(
+        (size[0] // 2, size[1] // 3), text, font=_font(140), fill=(0, 0, 0, 255), anchor="mm", align="center"
+    )
+    return image
+
+
+@pytest.fixture
+def designs(tmp_path):
+    paths = {}
+    for index, text in enumerate(TEXTS):
+        path = tmp_path / f"design-{index}.png"
+        text_design(text).save(path)
+        paths[text] = str(path)
+    return paths
+
+
+def test_distinct_transparent_designs_are_not_matched(designs):
+    index = PerceptualIndex()
+    hashes = {text: dhash(path) for text, path in designs.items()}
+    for a, b in itertools.combinations(TEXTS, 2):
+        assert (hashes[a] ^ hashes[b]).bit_count() > index.threshold, (a, b)
+    for text, value in hashes.items():
+        assert index.claim(text, value) is None
+
+
+def test_reexports_of_a_design_are_matched(designs, tmp_path):
+    original = text_design(TEXTS[0])
+    smaller = tmp_path / "smaller.png"
+    original.resize((1000, 1200)).save(smaller)
+    flattened = tmp_path / "flattened.jpg"
+    background = Image.new("RGB", original.size, "white")
+    background.paste(original, mask=original)
+    background.save(flattened, quality=60)
+    moved = tmp_path / "moved.png"
+    original.transform(original.size, Image.Transform.AFFINE, (1, 0, 40, 0, 1, 60)).save(moved)
+
+    index = PerceptualIndex()
+    index.claim("original", dhash(designs[TEXTS[0]]))
+    for path in (smaller, flattened, moved):
+        match = index.claim(str(path), dhash(str(path)))
+        assert match is not None and match[0] == "original"
+
+
+def test_index_matches_brute_force():
+    import random
+
+    rng = random.Random(7)
+    index = PerceptualIndex(threshold=20)
+    hashes = {str(i): rng.getrandbits(256) for i in range(2000)}
+    index.load(hashes.items())
+    for key in rng.sample(sorted(hashes), 50):
+        query = hashes[key]
+        for bit in rng.sample(range(256), rng.randint(0, 20)):
+            query ^= 1 << bit
+        expected = {k for k, v in hashes.items() if (v ^ query).bit_count() <= 20}
+        assert {k for k, _ in index.search(query, limit=len(hashes))} == expected
+
+
+def test_discard_and_readd():
+    index = PerceptualIndex()
+    index.add("a", 1 << 200)
+    index.discard("a")
+    assert index.search(1 << 200) == []
+    index.add("a", 1 << 200)
+    assert index.search(1 << 200) == [("a", 0)]
@@ -8,6 +8,13 @@ const api = async (path, opts = {}) => {
   return payload;
 };
 
+const apiPage = async (path) => {
+  const res = await fetch(`/api${path}`);
+  const payload = await res.json();
+  if (!res.ok) throw new Error(payload.detail || JSON.stringify(payload));
+  return { items: payload, next: res.headers.get('X-Next-Cursor') };
+};
+
 let settings = {
   selected_variants: [],
   selected_mockups: [],
@@ -17,6 +24,11 @@ let latestAnalysis = null;
 let latestListing = null;
 let loadedVariants = [];
 let loadedMockups = [];
+let recentRuns = [];
+const pages = {
+  runs: { items: [], next: null, paged: false, limit: 50 },
+  logs: { items: [], next: null, paged: false, limit: 100 },
+};
 
 const $ = (id) => document.getElementById(id);
 
@@ -46,6 +58,23 @@ async function loadSettings() {
   hydrateSettingsForm();
 }
 
+async function loadWatchFolders() {
+  const [folders, profiles] = await Promise.all([api('/watch-folders'), api('/profiles')]);
+  $('watch_folders').value = JSON.stringify(folders, null, 2);
+  $('profiles').value = JSON.stringify(profiles, null, 2);
+}
+
+async function saveProfiles() {
+  const profiles = JSON.parse($('profiles').value || '{}');
+  const existing = await api('/profiles');
+  for (const [name, overrides] of Object.entries(profiles)) {
+    await api(`/profiles/${encodeURIComponent(name)}`, { method: 'PUT', body: JSON.stringify(overrides) });
+  }
+  for (const name of Object.keys(existing).filter((n) => !(n in profiles))) {
+    await api(`/profiles/${encodeURIComponent(name)}`, { method: 'DELETE' });
+  }
+}
+
 async function saveSettings() {
   settings.watch_folder = $('watch_folder').value.trim();
   settings.printify_api_key = $('printify_api_key').value.trim();
@@ -63,32 +92,137 @@ function setStatus(el, text, ok = true) {
   el.className = ok ? 'ok' : 'error';
 }
 
+function renderMonitorStatus(s) {
+  const active = (s.workers || []).filter((w) => w.current_file);
+  const current = active.length
+    ? active.map((w) => `${w.worker}: ${w.current_file}${w.stage ? ` [${w.stage}]` : ''}`).join(', ')
+    : '-';
+  const baseline = (s.baseline || []).map((b) => `${b.folder}: ${b.state} (${b.scanned} scanned, ${b.hashed} hashed)`).join(', ') || '-';
+  const folders = (s.watch_folders || []).map((f) => `${f.path}${f.recursive ? ' (recursive)' : ''}${f.profile ? ` [${f.profile}]` : ''}`).join(', ');
+  setStatus(
+    $('monitor_status'),
+    `Monitoring: ${s.monitoring ? 'ON' : 'OFF'} | Folders: ${folders || '-'} | Settling: ${s.settling || 0} | Queue: ${s.queue_size} | Stages: ${Object.entries(s.stage_queues || {}).map(([k, v]) => `${k} ${v}`).join(', ') || '-'} | Workers: ${active.length}/${(s.workers || []).length} | Current: ${current} | Baseline: ${baseline}`,
+    true
+  );
+}
+
 async function refreshMonitorStatus() {
   try {
-    const s = await api('/monitor/status');
-    setStatus(
-      $('monitor_status'),
-      `Monitoring: ${s.monitoring ? 'ON' : 'OFF'} | Folder: ${s.watch_folder || '-'} | Queue: ${s.queue_size} | Current: ${s.current_file || '-'}`,
-      true
-    );
+    renderMonitorStatus(await api('/monitor/status'));
   } catch (e) {
     setStatus($('monitor_status'), e.message, false);
   }
 }
 
-async function refreshDashboard() {
-  const [stats, runs, logs] = await Promise.all([api('/dashboard'), api('/runs'), api('/logs')]);
+function listQuery(kind, before) {
+  const params = new URLSearchParams({ limit: String(pages[kind].limit) });
+  if (kind === 'runs' && $('filter_status').value) params.set('status', $('filter_status').value);
+  if (kind === 'logs' && $('filter_level').value) params.set('level', $('filter_level').value);
+  if ($('filter_path').value.trim()) params.set('path_prefix', $('filter_path').value.trim());
+  if (before) params.set('before_id', before);
+  return `/${kind}?${params}`;
+}
+
+async function loadPage(kind, older = false) {
+  const page = pages[kind];
+  const result = await apiPage(listQuery(kind, older ? page.next : null));
+  page.items = older ? page.items.concat(result.items) : result.items;
+  page.next = result.next;
+  page.paged = older;
+  renderPage(kind);
+}
+
+function renderPage(kind) {
+  const page = pages[kind];
+  $(`${kind}_json`).textContent = JSON.stringify(page.items, null, 2);
+  $(`btn_more_${kind}`).disabled = !page.next;
+}
+
+function matchesFilters(kind, item) {
+  const prefix = $('filter_path').value.trim();
+  if (prefix && !(item.image_path || '').startsWith(prefix)) return false;
+  if (kind === 'runs') return !$('filter_status').value || item.status === $('filter_status').value;
+  return !$('filter_level').value || item.level === $('filter_level').value.toUpperCase();
+}
+
+function upsertNewest(items, item, limit) {
+  const index = items.findIndex((x) => x.id === item.id);
+  if (index >= 0) return items.map((x, i) => (i === index ? { ...x, ...item } : x));
+  if (items.length && item.id < items[0].id) return items;
+  return [item, ...items].slice(0, limit);
+}
+
+// Live updates only touch the newest page; once older pages are loaded the view stays put.
+function prependLive(kind, newItems) {
+  const page = pages[kind];
+  const matching = newItems.filter((item) => matchesFilters(kind, item));
+  if (page.paged || !matching.length) return;
+  let items = page.items;
+  matching.forEach((item) => { items = upsertNewest(items, item, Infinity); });
+  if (items.length > page.limit) {
+    items = items.slice(0, page.limit);
+    page.next = String(items[items.length - 1].id);
+  }
+  page.items = items;
+  renderPage(kind);
+}
+
+function applyRun(run) {
+  recentRuns = upsertNewest(recentRuns, run, 8);
+  renderRecentRuns();
+  const page = pages.runs;
+  if (!page.paged && page.items.some((x) => x.id === run.id)) {
+    page.items = page.items.map((x) => (x.id === run.id ? { ...x, ...run } : x)).filter((x) => matchesFilters('runs', x));
+    renderPage('runs');
+  } else {
+    prependLive('runs', [run]);
+  }
+}
+
+function renderStats(stats) {
   $('stat_total').textContent = stats.total_products;
   $('stat_draft').textContent = stats.draft_products;
   $('stat_logs').textContent = stats.total_logs;
   $('stat_errors').textContent = stats.error_logs;
+  $('stat_throughput').textContent = `Last hour: ${stats.drafts_last_hour} drafts | error rate ${(stats.error_rate_last_hour * 100).toFixed(1)}%`;
+}
 
-  $('recent_runs').innerHTML = runs.length
-    ? runs.slice(0, 8).map((r) => `<div class="run"><b>${r.status.toUpperCase()}</b> | ${r.image_path} ${r.printify_product_id ? `| draft: ${r.printify_product_id}` : ''}${r.error_message ? ` | <span class='error'>${r.error_message}</span>` : ''}</div>`).join('')
+function renderRecentRuns() {
+  $('recent_runs').innerHTML = recentRuns.length
+    ? recentRuns.map((r) => `<div class="run">${r.thumbnail ? `<img class="thumb" src="${r.thumbnail}" loading="lazy" alt="" onerror="this.remove()">` : ''}<b>${r.status.toUpperCase()}</b> | ${r.image_path} ${r.printify_product_id ? `| draft: ${r.printify_product_id}` : ''}${r.error_message ? ` | <span class='error'>${r.error_message}</span>` : ''}</div>`).join('')
     : '<div class="muted">[ NO PRODUCTS YET ] Upload images to start creating products</div>';
+}
+
+async function refreshDashboard() {
+  const [stats, runs] = await Promise.all([api('/dashboard'), api('/runs?limit=8&include_json=false')]);
+  renderStats(stats);
+  recentRuns = runs;
+  renderRecentRuns();
+
+  // Keep older pages the user loaded instead of snapping back to the newest rows.
+  await Promise.all(['runs', 'logs'].filter((kind) => !pages[kind].paged).map((kind) => loadPage(kind)));
+}
 
-  $('runs_json').textContent = JSON.stringify(runs, null, 2);
-  $('logs_json').textContent = JSON.stringify(logs, null, 2);
+// The server pushes changes over one event stream; REST is only used to (re)load full state.
+function connectEvents() {
+  if (!window.EventSource) {
+    setInterval(refreshMonitorStatus, 4000);
+    setInterval(refreshDashboard, 7000);
+    return;
+  }
+  const source = new EventSource('/api/events');
+  let connected = false;
+  const json = (handler) => (event) => handler(JSON.parse(event.data));
+  source.addEventListener('open', () => {
+    // Anything that happened while the stream was down is only visible over REST.
+    if (connected) Promise.all([refreshMonitorStatus(), refreshDashboard()]).catch(() => {});
+    connected = true;
+  });
+  source.addEventListener('status', json(renderMonitorStatus));
+  source.addEventListener('dashboard', json(renderStats));
+  source.addEventListener('run', json(applyRun));
+  source.addEventListener('logs', json((logs) => prependLive('logs', logs)));
+  source.addEventListener('resync', () => refreshDashboard().catch(() => {}));
 }
 
 function prettyAnalysis(analysis, listing) {
@@ -132,7 +266,11 @@ function renderVariants() {
       const id = Number(btn.dataset.variant);
       const exists = settings.selected_variants.find((x) => x.variant_id === id);
       if (exists) settings.selected_variants = settings.selected_variants.filter((x) => x.variant_id !== id);
-      else settings.selected_variants.push({ variant_id: id, enabled: true, price: 1999 });
+      else {
+        // No price: the pricing engine prices it from cost, options and the pricing rules.
+        const variant = loadedVariants.find((x) => x.id === id) || {};
+        settings.selected_variants.push({ variant_id: id, enabled: true, cost: variant.cost, options: variant.options });
+      }
       if (settings.selected_variants.length > 100) {
         settings.selected_variants = settings.selected_variants.slice(0, 100);
         alert('Printify limit is 100 variants.');
@@ -166,6 +304,22 @@ function bindActions() {
     catch (e) { setStatus($('monitor_status'), e.message, false); }
   });
 
+  $('btn_save_folders').addEventListener('click', async () => {
+    try {
+      await api('/watch-folders', { method: 'POST', body: $('watch_folders').value || '[]' });
+      await loadWatchFolders();
+      setStatus($('monitor_status'), 'Watch folders saved', true);
+    } catch (e) { setStatus($('monitor_status'), e.message, false); }
+  });
+
+  $('btn_save_profiles').addEventListener('click', async () => {
+    try {
+      await saveProfiles();
+      await loadWatchFolders();
+      setStatus($('monitor_status'), 'Profiles saved', true);
+    } catch (e) { setStatus($('monitor_status'), e.message, false); }
+  });
+
   $('btn_monitor_start').addEventListener('click', async () => {
     try { await saveSettings(); await api('/monitor/start', { method: 'POST' }); await refreshMonitorStatus(); }
     catch (e) { setStatus($('monitor_status'), e.message, false); }
@@ -212,7 +366,7 @@ function bindActions() {
     try {
       const image_path = $('image_path').value.trim();
       const result = await api('/queue', { method: 'POST', body: JSON.stringify({ image_path }) });
-      setStatus($('upload_status'), `Queued: ${result.queued_path}`, true);
+      setStatus($('upload_status'), `Queued: ${result.queued_path} (job ${result.job_id})`, true);
       await refreshMonitorStatus();
     } catch (e) {
       setStatus($('upload_status'), e.message, false);
@@ -226,7 +380,7 @@ function bindActions() {
   });
 
   $('btn_select_all').addEventListener('click', async () => {
-    settings.selected_variants = loadedVariants.slice(0, 100).map((v) => ({ variant_id: v.id, enabled: true, price: v.price || 1999, cost: v.cost }));
+    settings.selected_variants = loadedVariants.slice(0, 100).map((v) => ({ variant_id: v.id, enabled: true, price: v.price, cost: v.cost, options: v.options }));
     renderVariants();
     await saveSettings();
   });
@@ -237,6 +391,13 @@ function bindActions() {
     await saveSettings();
   });
 
+  $('btn_apply_filters').addEventListener('click', async () => {
+    await Promise.all([loadPage('runs'), loadPage('logs')]);
+  });
+
+  $('btn_more_runs').addEventListener('click', () => loadPage('runs', true));
+  $('btn_more_logs').addEventListener('click', () => loadPage('logs', true));
+
   $('btn_fetch_mockups').addEventListener('click', async () => {
     await saveSettings();
     loadedMockups = (await api(`/printify/mockups?blueprint_id=${settings.blueprint_id}&print_provider_id=${settings.print_provider_id}`)).mockups || [];
@@ -248,10 +409,10 @@ async function bootstrap() {
   bindTabs();
   bindActions();
   await loadSettings();
+  await loadWatchFolders();
   await refreshMonitorStatus();
   await refreshDashboard();
-  setInterval(refreshMonitorStatus, 4000);
-  setInterval(refreshDashboard, 7000);
+  connectEvents();
 }
 
 bootstrap();